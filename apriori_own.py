@@ -1,63 +1,199 @@
-from itertools import combinations
 from collections import defaultdict
+from multiprocessing import Pool
 
+import numpy as np
 
-def apriori_own(transactions, min_supp):
+from bitmap import item_bitmaps, popcount
+from encoding import encode_transactions
+
+BITMAP_BATCH_WORDS = 1 << 22  # Ile słów uint64 (32 MB) przetwarza jedna paczka kandydatów
+
+
+def generate_candidates(level):
+    """Kandydaci (k+1)-elementowi z poziomu k ({posortowana krotka: wsparcie}).
+
+    Łączone są tylko itemsety o wspólnym (k-1)-prefiksie, a przycinanie
+    to sprawdzenie podzbiorów w słowniku poziomu k.
+    """
+    groups = defaultdict(list)
+    for itemset in level:
+        groups[itemset[:-1]].append(itemset[-1])
+
+    candidates = []
+    for prefix, last_items in groups.items():
+        last_items.sort()
+        for i, a in enumerate(last_items):
+            for b in last_items[i + 1:]:
+                candidate = prefix + (a, b)
+                # Podzbiory bez a lub bez b są w poziomie z konstrukcji
+                if all(candidate[:j] + candidate[j + 1:] in level for j in range(len(prefix))):
+                    candidates.append(candidate)
+    return candidates
+
+
+def build_candidate_trie(candidates):
+    """Drzewo prefiksowe kandydatów (posortowanych krotek); liść trzyma indeks kandydata."""
+    root = {}
+    for index, candidate in enumerate(candidates):
+        node = root
+        for item in candidate[:-1]:
+            node = node.setdefault(item, {})
+        node[candidate[-1]] = index
+    return root
+
+
+def _count_in_trie(node, transaction, start, depth, counts, weight):
+    # depth - ile przedmiotów brakuje jeszcze do pełnego kandydata
+    if depth == 1:
+        for item in transaction[start:]:
+            index = node.get(item)
+            if index is not None:
+                counts[index] += weight
+        return
+    for pos in range(start, len(transaction) - depth + 1):
+        child = node.get(transaction[pos])
+        if child is not None:
+            _count_in_trie(child, transaction, pos + 1, depth - 1, counts, weight)
+
+
+def _count_pairs(trie, num_candidates, pairs, k):
+    counts = [0] * num_candidates
+    for transaction, weight in pairs:
+        if len(transaction) >= k:
+            _count_in_trie(trie, transaction, 0, k, counts, weight)
+    return counts
+
+
+def count_candidates(transactions, candidates, k):
+    """Zlicza wsparcie k-elementowych kandydatów w {posortowana krotka: krotność}.
+
+    Transakcja schodzi tylko tymi gałęziami drzewa, które zaczynają się
+    od jej własnych przedmiotów, zamiast testować każdego kandydata osobno.
+    """
+    return _count_pairs(build_candidate_trie(candidates), len(candidates), transactions.items(), k)
+
+
+# Stan procesu roboczego: drzewo kandydatów bieżącego poziomu (budowane raz na poziom)
+_worker_level = None
+
+
+def _count_shard(task):
+    global _worker_level
+    k, candidates, shard = task
+    if _worker_level is None or _worker_level[0] != k:
+        _worker_level = (k, build_candidate_trie(candidates), len(candidates))
+    _, trie, num_candidates = _worker_level
+    return _count_pairs(trie, num_candidates, shard, k)
+
+
+def count_candidates_parallel(transactions, candidates, k, workers, pool=None):
+    """Jak count_candidates, ale fragmenty bazy liczone są w puli procesów.
+
+    Poziom dzielony jest na tyle fragmentów, ile jest procesów, więc kandydaci
+    trafiają do każdego procesu raz na poziom; częściowe liczniki są sumowane.
+    pool - pula utrzymywana przez cały przebieg Apriori (bez niej tworzona jest nowa).
+    """
+    pairs = list(transactions.items())
+    tasks = [(k, candidates, pairs[i::workers]) for i in range(workers)]
+    if pool is None:
+        with Pool(workers) as pool:
+            partial_counts = pool.map(_count_shard, tasks, chunksize=1)
+    else:
+        partial_counts = pool.map(_count_shard, tasks, chunksize=1)
+    return [sum(counts) for counts in zip(*partial_counts)]
+
+
+def reduce_transactions(transactions, items, min_length):
+    """Zostawia w transakcjach tylko `items`, odrzuca krótsze niż min_length i scala identyczne.
+
+    Zwraca {posortowana krotka: krotność}.
+    """
+    reduced = defaultdict(int)
+    for transaction, weight in transactions:
+        transaction = tuple(item for item in transaction if item in items)
+        if len(transaction) >= min_length:
+            reduced[transaction] += weight
+    return reduced
+
+
+def count_candidates_bitmap(bits, candidates, batch_words=BITMAP_BATCH_WORDS):
+    """Zlicza wsparcie kandydatów jako popcount z AND wierszy macierzy bitowej.
+
+    Kandydaci jednego poziomu przetwarzani są paczkami, żeby bufor
+    pośredni nie przekraczał batch_words słów.
+    """
+    candidates = np.asarray(candidates, dtype=np.intp)
+    batch = max(1, batch_words // bits.shape[1])
+    counts = np.empty(len(candidates), dtype=np.int64)
+    for start in range(0, len(candidates), batch):
+        block = candidates[start:start + batch]
+        acc = bits[block[:, 0]]
+        for column in range(1, block.shape[1]):
+            np.bitwise_and(acc, bits[block[:, column]], out=acc)
+        counts[start:start + batch] = popcount(acc)
+    return counts.tolist()
+
+
+def apriori_own(transactions, min_supp, method="trie", workers=1):
+    """Apriori; method="trie" liczy wsparcie drzewem prefiksowym, "bitmap" - macierzą bitową numpy.
+
+    Przy workers > 1 zliczanie drzewem odbywa się w jednej puli procesów na cały
+    przebieg; tryb "bitmap" jest jednowątkowy (numpy) i nie przyjmuje workers > 1.
+    """
     if not transactions or not (0 <min_supp <=1):
         return {}
+    if method not in ("trie", "bitmap"):
+        raise ValueError(f"Nieznana metoda zliczania: {method}")
+    if method == "bitmap" and workers > 1:
+        raise ValueError("Tryb bitmap nie obsługuje workers > 1")
+
+    # Kodowanie na id - liczności pojedynczych przedmiotów są już w słowniku
+    encoded, vocabulary = encode_transactions(transactions)
+    min_count = len(encoded) * min_supp
+
+    # Poziom k: {posortowana krotka id: wsparcie}
+    level = {(item,): count for item, count in enumerate(vocabulary.counts) if count >= min_count}
+    frequent_itemsets = dict(level)
 
-    transactions=[frozenset(t) for t in transactions]
-    min_count = len(transactions) * min_supp
-    item_counts = defaultdict(int)
-
-    for transaction in transactions:
-        for item in transaction:
-            item_counts[frozenset([item])] += 1
-    
-    
-    frequent_itemsets = {itemset: count for itemset, count in item_counts.items() if count >= min_count}
-    if not frequent_itemsets:
-        return frequent_itemsets
-    
-    
+    # Częste przedmioty mają id 0..len(level)-1, więc tylko one trafiają do macierzy
+    bits = None
+    if method == "bitmap":
+        bits = item_bitmaps(encoded, len(level))
+    else:
+        transactions = reduce_transactions(((t, 1) for t in encoded), set(range(len(level))), 2)
+
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        frequent_itemsets = _apriori_levels(level, frequent_itemsets, transactions, bits, min_count,
+                                            method, workers, pool)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return vocabulary.decode_itemsets(frequent_itemsets)
+
+
+def _apriori_levels(level, frequent_itemsets, transactions, bits, min_count, method, workers, pool):
     k = 2
-    while True:
-        candidates = set()
-        itemsets = list(frequent_itemsets.keys())
-        
-        for i in range(len(itemsets)):
-            for j in range(i + 1, len(itemsets)):
-                a, b = itemsets[i], itemsets[j]
-                if k > 2:  
-                    a_sorted = sorted(list(a))
-                    b_sorted = sorted(list(b))
-                    if a_sorted[:k-2] != b_sorted[:k-2]:
-                        continue  
-                union = a.union(b)
-                if len(union) == k and all(
-                    frozenset(subset) in frequent_itemsets 
-                    for subset in combinations(union, k-1)
-                ):
-                    candidates.add(union)
-        
+    while level:
+        candidates = generate_candidates(level)
         if not candidates: break
 
         # Zliczanie wsparcia
-        candidate_counts = defaultdict(int)
-        for transaction in transactions:
-            for candidate in candidates:
-                if candidate.issubset(transaction):
-                    candidate_counts[candidate] += 1
-        
+        if method == "bitmap":
+            candidate_counts = count_candidates_bitmap(bits, candidates)
+        elif workers > 1:
+            candidate_counts = count_candidates_parallel(transactions, candidates, k, workers, pool)
+        else:
+            candidate_counts = count_candidates(transactions, candidates, k)
+
         # Filtracja kandydatów
-        new_frequent = {itemset: count for itemset, count in candidate_counts.items() if count >= min_count}
-        if not new_frequent:
-            break
-        frequent_itemsets.update(new_frequent)
-        k += 1
+        level = {itemset: count for itemset, count in zip(candidates, candidate_counts) if count >= min_count}
+        frequent_itemsets.update(level)
 
+        # Kolejny przebieg widzi tylko przedmioty z częstych k-zbiorów i transakcje dłuższe niż k
+        if method == "trie" and level:
+            alive = {item for itemset in level for item in itemset}
+            transactions = reduce_transactions(transactions.items(), alive, k + 1)
+        k += 1
     return frequent_itemsets
-
-
-
-
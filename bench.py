@@ -0,0 +1,288 @@
+import csv
+import gc
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from statistics import median, quantiles
+
+NUM_RUNS = 5  # Liczba mierzonych prób (każda w nowym procesie)
+WARMUP_RUNS = 1  # Próby rozgrzewkowe odrzucane przed pomiarem (pamięć podręczna OS, pliki .pyc)
+TIMEOUT = 600  # Limit czasu całej komórki w sekundach (rozgrzewka, próby i przebieg tracemalloc)
+SAMPLE_INTERVAL = 0.02  # Co ile sekund proces nadrzędny próbkuje pamięć drzewa procesów próby
+RESULT_PREFIX = "BENCH:"  # Znacznik linii z wynikiem próby na stdout procesu potomnego
+RESULTS_VERSION = 2  # Wersja układu kolumn plików wyników - nowy układ trafia do nowych plików
+RESULTS_HEADER = ["Plik", "Algorytm", "Mediana czasu (s)", "Przyrost RSS (MB)", "Liczba zbiorów",
+                  "IQR czasu (s)", "Min. czas (s)", "Szczyt RSS (MB)", "Szczyt tracemalloc (MB)", "Pomiar z progu"]
+
+
+def _peak_rss_mb(children=False):
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # Linux podaje KB, macOS bajty
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _process_memory_kb(pid):
+    # PSS dzieli strony współdzielone (fork) między procesy, więc suma nie liczy ich wielokrotnie
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def tree_memory_mb(pid=None):
+    """Pamięć procesu i wszystkich jego potomków (suma PSS, inaczej RSS) z /proc albo None poza Linuksem."""
+    pid = pid or os.getpid()
+    if not os.path.exists(f"/proc/{pid}/task"):
+        return None
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        try:
+            total += _process_memory_kb(current)
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    stack.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            continue  # Proces zakończył się w trakcie odczytu
+    return total / 1024
+
+
+def _load(file_path, loader):
+    from store import load_transactions_from_csv, open_store
+    return open_store(file_path) if loader == "store" else load_transactions_from_csv(file_path)
+
+
+def run_trial(spec):
+    """Jedna próba w bieżącym procesie: wczytanie, pomiar wywołania, opcjonalny zapis wyniku.
+
+    Czas to perf_counter samego wywołania; pamięć to przyrost szczytowego RSS
+    ponad poziom po wczytaniu danych, więc obejmuje też alokacje w C (fim).
+    Procesy potomne (pule workers) próbkuje z zewnątrz _spawn - próba podaje
+    tylko okno wywołania i pamięć drzewa przed nim; bez /proc doliczany jest
+    szczytowy RSS największego zakończonego potomka.
+    Przy spec["trace"] zamiast tego mierzony jest szczyt tracemalloc.
+    """
+    func = getattr(importlib.import_module(spec["module"]), spec["function"])
+    transactions = _load(spec["file"], spec["loader"])
+    if not transactions:
+        raise ValueError(f"Brak transakcji w pliku {spec['file']}")
+    support = spec["support"]
+    if spec["module"] == "fim":
+        call = lambda: func(transactions, supp=support * 100)
+    else:
+        call = lambda: func(transactions, support, **spec["options"])
+
+    gc.collect()
+    baseline = _peak_rss_mb()
+    tree_baseline = None if spec["trace"] else tree_memory_mb()
+    if spec["trace"]:
+        import tracemalloc
+        tracemalloc.start()
+        result = call()
+        traced = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+        elapsed = None
+    else:
+        call_start = time.monotonic()
+        start = time.perf_counter()
+        result = call()
+        elapsed = time.perf_counter() - start
+        call_end = time.monotonic()
+        traced = None
+
+    if spec.get("result_path"):
+        from cache import encode_itemsets
+        import numpy as np
+        itemsets = result if isinstance(result, dict) else {frozenset(i): c for i, c in result}
+        np.savez_compressed(spec["result_path"], **encode_itemsets(itemsets))
+    memory = max(0.0, _peak_rss_mb() - baseline)
+    if not spec["trace"] and tree_baseline is None:
+        memory += _peak_rss_mb(children=True)
+    return {
+        "time": elapsed,
+        "memory": memory,
+        "peak_rss": _peak_rss_mb(),
+        "traced": traced,
+        "tree_baseline": tree_baseline,
+        "call_window": None if spec["trace"] else [call_start, call_end],
+        "itemsets": len(result),
+        "num_transactions": len(transactions),
+    }
+
+
+def _run_sampled(args, deadline, sample):
+    # Czeka na proces do terminu; przy sample=True co SAMPLE_INTERVAL zapisuje
+    # (czas, pamięć drzewa procesów) - z zewnątrz, więc bez wpływu na czas próby
+    samples = []
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        proc = subprocess.Popen(args, stdout=out, stderr=err, cwd=os.getcwd())
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise subprocess.TimeoutExpired(args, deadline)
+                try:
+                    proc.wait(timeout=min(SAMPLE_INTERVAL, remaining))
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+                if sample:
+                    memory = tree_memory_mb(proc.pid)
+                    if memory is not None:
+                        samples.append((time.monotonic(), memory))
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+        out.seek(0)
+        err.seek(0)
+        return proc.returncode, out.read().decode(errors="replace"), err.read().decode(errors="replace"), samples
+
+
+def _spawn(spec, deadline):
+    # Nowy interpreter na każdą próbę: brak stanu po poprzednich (sterta, cache, RSS);
+    # próba dostaje czas pozostały do wspólnego terminu komórki
+    if deadline - time.monotonic() <= 0:
+        raise subprocess.TimeoutExpired(spec["function"], 0)
+    returncode, stdout, stderr, samples = _run_sampled(
+        [sys.executable, os.path.abspath(__file__), json.dumps(spec)], deadline, not spec["trace"])
+    for line in reversed(stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            trial = json.loads(line[len(RESULT_PREFIX):])
+            break
+    else:
+        raise RuntimeError(stderr.strip().splitlines()[-1] if stderr.strip() else f"kod wyjścia {returncode}")
+    # Pule procesów algorytmu: szczyt próbek z okna wywołania ponad pamięć drzewa tuż przed nim
+    if trial["call_window"] and trial["tree_baseline"] is not None:
+        start, end = trial["call_window"]
+        window = [memory for t, memory in samples if start <= t <= end]
+        if window:
+            trial["memory"] = max(trial["memory"], max(window) - trial["tree_baseline"])
+            trial["peak_rss"] = max(trial["peak_rss"], max(window))
+    return trial
+
+
+def summarize(samples):
+    """Mediana, rozstęp międzykwartylowy i minimum próbek."""
+    if not samples:
+        return {"median": None, "iqr": None, "min": None}
+    q1, _, q3 = quantiles(samples, n=4, method="inclusive") if len(samples) > 1 else (samples[0],) * 3
+    return {"median": median(samples), "iqr": q3 - q1, "min": min(samples)}
+
+
+def benchmark(name, func, file_path, support, runs=NUM_RUNS, warmup=WARMUP_RUNS, timeout=TIMEOUT,
+              trace_memory=False, options=None, loader="list", keep_result=False):
+    """Mierzy algorytm w izolowanych procesach i zwraca statystyki albo None przy błędzie.
+
+    func musi być importowalna (moduł + nazwa) - w procesie potomnym
+    wywoływana jest tak samo jak w main.py/comapre.py. Przy trace_memory
+    wykonywany jest osobny przebieg z tracemalloc, niewpływający na czasy.
+    timeout dotyczy całej komórki - wszystkich prób łącznie.
+    keep_result=True zwraca też słownik {frozenset: wsparcie} z ostatniej próby.
+    """
+    if runs < 1:
+        raise ValueError(f"Liczba prób musi być dodatnia (runs={runs})")
+    spec = {"module": func.__module__, "function": func.__name__, "file": file_path,
+            "support": support, "options": options or {}, "loader": loader, "trace": False}
+    samples = []
+    deadline = time.monotonic() + timeout
+    with tempfile.TemporaryDirectory() as tmp:
+        result_path = os.path.join(tmp, "result.npz")
+        try:
+            for i in range(warmup + runs):
+                last = i == warmup + runs - 1
+                trial = _spawn({**spec, "result_path": result_path if keep_result and last else None}, deadline)
+                if i >= warmup:
+                    samples.append(trial)
+            traced = [_spawn({**spec, "trace": True}, deadline)["traced"] for _ in range(runs)] if trace_memory else []
+        except subprocess.TimeoutExpired:
+            print(f"[LIMIT CZASU] {name}: komórka przekroczyła {timeout} s")
+            return None
+        except Exception as e:
+            print(f"[BŁĄD] Podczas działania {name}: {e}")
+            return None
+        result = None
+        if keep_result:
+            from cache import decode_itemsets
+            import numpy as np
+            with np.load(result_path) as arrays:
+                result = decode_itemsets(arrays)
+
+    times = summarize([s["time"] for s in samples])
+    memory = summarize([s["memory"] for s in samples])
+    return {
+        "algorithm": name,
+        "avg_time": times["median"],
+        "time_iqr": times["iqr"],
+        "time_min": times["min"],
+        "avg_memory": memory["median"],
+        "peak_rss": max(s["peak_rss"] for s in samples),
+        "traced_memory": summarize(traced)["median"],
+        "avg_itemsets": samples[-1]["itemsets"],
+        "num_transactions": samples[-1]["num_transactions"],
+        "samples": [s["time"] for s in samples],
+        "memory_samples": [s["memory"] for s in samples],
+        "result": result,
+    }
+
+
+def results_path(prefix, support):
+    """Nazwa pliku wyników dla progu, z wersją układu kolumn (np. results_support_0.05_v2.csv)."""
+    return f"{prefix}_{support:.2f}_v{RESULTS_VERSION}.csv"
+
+
+def _format(value, spec):
+    # Brak wartości (np. czas wyniku wyprowadzonego z niższego progu) - pusta komórka
+    return "" if value is None else format(value, spec)
+
+
+def write_results_csv(output_path, file_name, results, separator=True):
+    """Dopisuje wyniki benchmark do pliku CSV (separator - pusta linia po bloku wyników pliku).
+
+    Do istniejącego pliku o innym nagłówku nic nie jest dopisywane (ValueError) -
+    wiersze nie mogą trafić pod kolumny o innym znaczeniu.
+    """
+    header = None
+    if os.path.exists(output_path):
+        with open(output_path, newline='', encoding='utf-8', errors='replace') as csvfile:
+            header = next(csv.reader(csvfile), None)
+        if header is not None and header != RESULTS_HEADER:
+            raise ValueError(f"Plik {output_path} ma inny układ kolumn niż wersja {RESULTS_VERSION}")
+
+    with open(output_path, 'a', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        if header is None:
+            writer.writerow(RESULTS_HEADER)
+        for res in results:
+            if res:
+                writer.writerow([
+                    file_name,
+                    res["algorithm"],
+                    _format(res["avg_time"], ".4f"),
+                    _format(res["avg_memory"], ".2f"),
+                    f"{res['avg_itemsets']:.0f}",
+                    _format(res["time_iqr"], ".4f"),
+                    _format(res["time_min"], ".4f"),
+                    _format(res["peak_rss"], ".2f"),
+                    _format(res["traced_memory"], ".2f"),
+                    _format(res.get("derived_from"), ".2f")
+                ])
+        if separator:
+            writer.writerow([])
+
+
+if __name__ == "__main__":
+    print(RESULT_PREFIX + json.dumps(run_trial(json.loads(sys.argv[1]))))
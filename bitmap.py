@@ -0,0 +1,48 @@
+import numpy as np
+
+WORD_BITS = 64
+
+
+if hasattr(np, "bitwise_count"):
+    def popcount(words):
+        """Liczba ustawionych bitów w każdym wierszu (ostatnia oś) tablicy słów uint64."""
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+else:
+    _POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def popcount(words):
+        """Liczba ustawionych bitów w każdym wierszu (ostatnia oś) tablicy słów uint64."""
+        return _POPCOUNT8[np.ascontiguousarray(words).view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+
+def num_words(num_transactions):
+    """Liczba słów uint64 potrzebna na jeden wiersz bitów."""
+    return (num_transactions + WORD_BITS - 1) // WORD_BITS
+
+
+def csr_arrays(transactions):
+    """Pary (numer transakcji, id przedmiotu) jako dwie tablice numpy.
+
+    Magazyn CSR oddaje swoje tablice bez kopiowania, listy są spłaszczane raz.
+    """
+    if hasattr(transactions, "row_index"):
+        return transactions.row_index(), transactions.items
+    lengths = np.fromiter((len(t) for t in transactions), dtype=np.int64, count=len(transactions))
+    items = np.fromiter((item for t in transactions for item in t), dtype=np.int32, count=int(lengths.sum()))
+    rows = np.repeat(np.arange(len(transactions), dtype=np.int32), lengths)
+    return rows, items
+
+
+def item_bitmaps(transactions, num_items):
+    """Macierz bitowa (num_items x słowa uint64): bit t wiersza i <=> przedmiot i w transakcji t.
+
+    Uwzględniane są tylko id < num_items (częste przedmioty mają najmniejsze id).
+    """
+    rows, items = csr_arrays(transactions)
+    keep = items < num_items
+    rows, items = rows[keep].astype(np.int64), items[keep].astype(np.int64)
+    width = num_words(len(transactions))
+    bits = np.zeros(num_items * width, dtype=np.uint64)
+    np.bitwise_or.at(bits, items * width + (rows >> 6),
+                     np.left_shift(np.uint64(1), (rows & 63).astype(np.uint64)))
+    return bits.reshape(num_items, width)
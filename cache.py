@@ -0,0 +1,231 @@
+import hashlib
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+CACHE_FOLDER = "./dane/cache/"
+MAX_CACHE_BYTES = 512 * 1024 * 1024  # Limit rozmiaru pamięci podręcznej (LRU powyżej)
+HASH_CHUNK = 1 << 20  # Ile bajtów pliku hashujemy naraz
+
+
+def file_fingerprint(file_path):
+    """SHA-256 zawartości pliku (czytanego blokami)."""
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def fim_min_count(raw):
+    """Próg bezwzględny jak w fim: ceil(support * n), odporny na błąd zaokrąglenia."""
+    return math.ceil(raw - 1e-9)
+
+
+# Próg bezwzględny min_count(support * n) algorytmów innych niż fim - pozwala odpowiedzieć
+# z wyniku przy niższym progu
+MIN_COUNT = {
+    "Apriori_Own": math.ceil,
+    "Eclat_Own": int,
+    "FPGrowth_Own": math.ceil,
+}
+# Metryki pomiaru zapisywane w pamięci podręcznej razem z wynikiem
+METRICS = ["avg_time", "time_iqr", "time_min", "avg_memory", "peak_rss", "traced_memory", "num_transactions"]
+
+
+def min_count_rule(algorithm):
+    """Reguła progu bezwzględnego algorytmu (domyślnie jak w fim)."""
+    return MIN_COUNT.get(algorithm, fim_min_count)
+
+
+def filter_itemsets(itemsets, min_count):
+    """Zbiory o wsparciu >= min_count; zbiory częste są domknięte w dół, więc wynik jest dokładny."""
+    return {itemset: count for itemset, count in itemsets.items() if count >= min_count}
+
+
+def encode_itemsets(itemsets):
+    """Zwarta postać słownika {frozenset etykiet: wsparcie}: tablice numpy jak w CSR."""
+    labels = sorted({label for itemset in itemsets for label in itemset}, key=str)
+    ids = {label: i for i, label in enumerate(labels)}
+    lengths = np.fromiter((len(itemset) for itemset in itemsets), dtype=np.int32, count=len(itemsets))
+    items = np.fromiter((ids[label] for itemset in itemsets for label in itemset),
+                        dtype=np.int32, count=int(lengths.sum()))
+    counts = np.fromiter(itemsets.values(), dtype=np.int64, count=len(itemsets))
+    labels = np.frombuffer(json.dumps(labels).encode("utf-8"), dtype=np.uint8)
+    return {"labels": labels, "lengths": lengths, "items": items, "counts": counts}
+
+
+def decode_itemsets(arrays):
+    labels = json.loads(arrays["labels"].tobytes().decode("utf-8"))
+    items = [labels[i] for i in arrays["items"].tolist()]
+    bounds = np.concatenate(([0], np.cumsum(arrays["lengths"]))).tolist()
+    return {frozenset(items[a:b]): count for a, b, count in zip(bounds, bounds[1:], arrays["counts"].tolist())}
+
+
+class ResultCache:
+    """Trwała pamięć podręczna wyników wydobywania zbiorów częstych.
+
+    Klucz to (odcisk zbioru danych, algorytm, parametry); dla jednego klucza
+    trzymane są wyniki przy różnych progach. Zapytanie o próg wyższy niż
+    zapisany jest obsługiwane filtrowaniem - takie trafienie daje same zbiory,
+    bez czasu i pamięci pomiaru. Indeks (index.json) pamięta czas
+    ostatniego użycia wpisów - po przekroczeniu max_bytes usuwane są najstarsze.
+    """
+
+    def __init__(self, folder=CACHE_FOLDER, max_bytes=MAX_CACHE_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(folder, "index.json")
+        os.makedirs(folder, exist_ok=True)
+        try:
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {"entries": {}, "fingerprints": {}}
+
+    def fingerprint(self, file_path):
+        """SHA-256 zawartości pliku; zapamiętany wg (ścieżka, rozmiar, mtime), żeby nie czytać pliku ponownie."""
+        stat = os.stat(file_path)
+        stamp = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        digest = self.index["fingerprints"].get(stamp)
+        if digest is None:
+            digest = file_fingerprint(file_path)
+            # Odcisk poprzedniej wersji tego samego pliku jest już nieaktualny
+            prefix = stamp.rsplit("|", 2)[0] + "|"
+            for old in [old for old in self.index["fingerprints"] if old.startswith(prefix)]:
+                del self.index["fingerprints"][old]
+            self.index["fingerprints"][stamp] = digest
+            self._save_index()
+        return digest
+
+    @staticmethod
+    def _key(fingerprint, algorithm, params):
+        return json.dumps([fingerprint, algorithm, params or {}], sort_keys=True)
+
+    def get(self, fingerprint, algorithm, params, support, min_count):
+        """Zwraca (zbiory, metadane, próg zapisanego wyniku) dla progu support albo None.
+
+        min_count(support * n) to próg bezwzględny algorytmu (np. min_count_rule);
+        None wyłącza wyprowadzanie wyniku z niższego progu (tylko dokładne trafienie).
+        Metadane wyniku wyprowadzonego to tylko num_transactions - czas i pamięć dotyczą innego progu.
+        """
+        key = self._key(fingerprint, algorithm, params)
+        candidates = [(name, entry) for name, entry in self.index["entries"].items()
+                      if entry["key"] == key and (entry["support"] == support
+                                                  or (min_count is not None and entry["support"] < support))]
+        if not candidates:
+            return None
+        # Najwyższy zapisany próg <= support daje najmniejszy wynik do przefiltrowania
+        name, entry = max(candidates, key=lambda x: x[1]["support"])
+        try:
+            with np.load(os.path.join(self.folder, name)) as arrays:
+                itemsets = decode_itemsets(arrays)
+        except (OSError, ValueError, KeyError):
+            del self.index["entries"][name]
+            self._save_index()
+            return None
+        meta = entry["meta"]
+        if entry["support"] != support:
+            itemsets = filter_itemsets(itemsets, min_count(support * entry["num_transactions"]))
+            meta = {"num_transactions": entry["num_transactions"]}
+        entry["last_used"] = time.time()
+        self._save_index()
+        return itemsets, meta, entry["support"]
+
+    def put(self, fingerprint, algorithm, params, support, itemsets, num_transactions, meta=None):
+        """Zapisuje wynik {frozenset etykiet: wsparcie} razem z metadanymi (np. czasem i pamięcią)."""
+        key = self._key(fingerprint, algorithm, params)
+        name = hashlib.sha256(f"{key}|{support!r}".encode("utf-8")).hexdigest()[:32] + ".npz"
+        path = os.path.join(self.folder, name)
+        np.savez_compressed(path, **encode_itemsets(itemsets))
+        self.index["entries"][name] = {
+            "key": key,
+            "support": support,
+            "num_transactions": num_transactions,
+            "meta": meta or {},
+            "size": os.path.getsize(path),
+            "last_used": time.time(),
+        }
+        self._evict()
+        self._save_index()
+
+    def _evict(self):
+        entries = self.index["entries"]
+        total = sum(entry["size"] for entry in entries.values())
+        for name in sorted(entries, key=lambda name: entries[name]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= entries.pop(name)["size"]
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except OSError:
+                pass
+
+    def _save_index(self):
+        # Zapis przez plik tymczasowy - przerwany zapis nie psuje indeksu
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+
+
+def measurement_params(runs, warmup, workers=None):
+    """Parametry pomiaru będące częścią klucza pamięci podręcznej i rekordu historii."""
+    return {"runs": runs, "warmup": warmup, **({"workers": workers} if workers else {})}
+
+
+def derive_result(res, measured_support, support):
+    """Wynik przy wyższym progu support, wyprowadzony filtrowaniem zbiorów pomiaru przy measured_support.
+
+    Czas i pamięć zostają z pomiaru, więc wiersz oznaczany jest progiem
+    źródłowym w "derived_from" (None, gdy support == measured_support
+    i sam res nie był wyprowadzony).
+    """
+    if support == measured_support:
+        return {"derived_from": None, **res}
+    min_count = min_count_rule(res["algorithm"])
+    itemsets = filter_itemsets(res["result"], min_count(support * res["num_transactions"]))
+    return {**res, "avg_itemsets": len(itemsets), "result": itemsets,
+            "derived_from": res.get("derived_from") or measured_support}
+
+
+def cache_lookup(cache, fingerprint, algorithm, params, support):
+    """Pomiar z pamięci podręcznej w postaci jak z bench.benchmark albo None.
+
+    Trafieniem jest też wynik zapisany przy niższym progu (po przefiltrowaniu
+    regułą min_count_rule algorytmu) - ma wtedy puste czasy i pamięć, a próg
+    źródłowy w "derived_from", bo pomiar dotyczył innego progu.
+    """
+    hit = cache.get(fingerprint, algorithm, params, support, min_count_rule(algorithm))
+    if hit is None:
+        return None
+    itemsets, meta, stored_support = hit
+    derived_from = stored_support if stored_support != support else None
+    if derived_from is not None:
+        meta = {**dict.fromkeys(METRICS), **meta}
+    return {"algorithm": algorithm, **meta, "avg_itemsets": len(itemsets), "result": itemsets,
+            "derived_from": derived_from}
+
+
+def store_measurement(cache, fingerprint, algorithm, params, file_path, support, res, history=None):
+    """Zapisuje świeży pomiar w pamięci podręcznej (gdy cache) i w historii wyników (gdy history)."""
+    if cache is not None:
+        cache.put(fingerprint, algorithm, params, support, res["result"], res["num_transactions"],
+                  {metric: res[metric] for metric in METRICS})
+    if history is not None:
+        history.record(res, file_path, support, fingerprint, params)
+
+
+def cached_measurement(cache, fingerprint, algorithm, measure, file_path, support, params, history=None,
+                       keep_result=False):
+    """Wynik z pamięci podręcznej albo świeży pomiar measure(keep_result), zapisany przez store_measurement."""
+    res = cache_lookup(cache, fingerprint, algorithm, params, support) if cache is not None else None
+    if res is not None:
+        return res
+    res = measure(keep_result or cache is not None)
+    if res is not None:
+        store_measurement(cache, fingerprint, algorithm, params, file_path, support, res, history)
+    return res
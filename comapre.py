@@ -1,108 +1,67 @@
-import csv
-import time
-import tracemalloc
 import os
 from fim import fpgrowth, apriori, eclat
-from statistics import mean
 
 from apriori_own import apriori_own
-from eclat import eclat as own_eclat, preprocess
-from own import build_fptree, find_frequent_patterns
+from bench import benchmark, results_path, write_results_csv
+from cache import ResultCache, cached_measurement, measurement_params
+from eclat import eclat_own
+from history import default_history
+from own import fpgrowth_own
+from store import open_store
 
 FILE_PATH = "./dane/synthetic_data/synthetic_data_bazowy.csv"
 
 SUPPORT_THRESHOLD = 0.4
+WORKERS = os.cpu_count() or 1  # Liczba procesów dla własnych implementacji z trybem równoległym
+USE_CACHE = True  # Wyniki zapamiętywane na dysku między uruchomieniami
+NUM_RUNS = 3  # Mierzone próby, każda w nowym procesie
+WARMUP_RUNS = 1  # Próby rozgrzewkowe przed pomiarem
+TIMEOUT = 600  # Limit czasu całej komórki - wszystkich prób łącznie (s)
+TRACE_MEMORY = False  # Osobny przebieg z tracemalloc (wolniejszy, nie wpływa na czasy)
+RECORD_HISTORY = True  # Surowe próbki każdego pomiaru dopisywane do results_history.jsonl
 
-def load_transactions_from_csv(file_path):
-    """Wczytuje transakcje z pliku CSV."""
-    try:
-        with open(file_path, 'r', newline='') as csvfile:
-            reader = csv.reader(csvfile)
-            return [
-                [item.strip() for item in row if item.strip()]
-                for row in reader if row
-            ]
-    except Exception as e:
-        print(f"[BŁĄD] Wczytywanie pliku {file_path}: {e}")
-        return None
-
-
-def run_algorithm(name, func, transactions, support):
-    """Uruchamia algorytm wielokrotnie i zwraca średnie metryki."""
-    times, memories, itemsets_counts = [], [], []
-    try:
-                tracemalloc.start()
-                start_time = time.time()
-                # Dostosowanie wywołania dla własnych implementacji:
-                if name == "Apriori_Own":
-                    result = func(transactions, support)
-                    count_result = len(result)
-                elif name == "Eclat_Own":
-                    data=preprocess(transactions)
-                    minsup_count = int(support * len(transactions))
+def run_algorithm(name, func, file_path, support, workers=None, keep_result=False):
+    """Mierzy algorytm w izolowanych procesach (bench.benchmark) i zwraca statystyki.
 
-                    result_dict = func([],sorted(data.items(), key=lambda item: len(item[1]), reverse=True), minsup_count)
-                    count_result = len(result_dict)
-                elif name == "FPGrowth_Own":
-                    # Budujemy drzewo i znajdujemy wzorce
-                    tree, header = build_fptree(transactions, support)
-                    patterns = find_frequent_patterns(tree, header, support,len(transactions))
-                    count_result = len(patterns)
-                else:
-                    result = func(transactions, supp=support * 100)
-                    count_result = len(result)
-                end_time = time.time()
-                current, peak = tracemalloc.get_traced_memory()
-                tracemalloc.stop()
+    workers - liczba procesów przekazywana implementacjom, które ją obsługują.
+    """
+    # Własne implementacje przyjmują wsparcie jako ułamek i czytają magazyn CSR
+    own = name.endswith("_Own")
+    options = {"workers": workers} if own and workers else {}
+    return benchmark(name, func, file_path, support, NUM_RUNS, WARMUP_RUNS, TIMEOUT, TRACE_MEMORY,
+                     options=options, loader="store" if own else "list", keep_result=keep_result)
 
-                times.append(end_time - start_time)
-                memories.append(peak / (1024 * 1024))  # MB
-                itemsets_counts.append(count_result)
-    except Exception as e:
-                print(f"[BŁĄD] Podczas działania {name}: {e}")
-                return None
-    return {
-        "algorithm": name,
-        "avg_time": mean(times),
-        "avg_memory": mean(memories),
-        "avg_itemsets": mean(itemsets_counts)
-    }
+def run_cached(cache, fingerprint, name, func, file_path, support, workers=None):
+    """Jak run_algorithm, ale najpierw szuka wyniku (także przy niższym progu) w pamięci podręcznej."""
+    measure = lambda keep: run_algorithm(name, func, file_path, support, workers, keep)
+    return cached_measurement(cache, fingerprint, name, measure, file_path, support,
+                              measurement_params(NUM_RUNS, WARMUP_RUNS, workers),
+                              default_history() if RECORD_HISTORY else None)
 
 def save_results_to_csv(file_name, support, results):
     """Zapisuje wyniki do pliku CSV."""
-    output_path = f"result_compare_algorythm_{support:.2f}.csv"
-    write_header = not os.path.exists(output_path)
-    with open(output_path, 'a', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-        if write_header:
-            writer.writerow(["Plik", "Algorytm", "Sr. czas (s)", "Sr. pamiec (MB)", "Sr. liczba zbiorow"])
-        for res in results:
-            if res:
-                writer.writerow([
-                    file_name,
-                    res["algorithm"],
-                    f"{res['avg_time']:.4f}",
-                    f"{res['avg_memory']:.2f}",
-                    f"{res['avg_itemsets']:.0f}"
-                ])
-        writer.writerow([])
+    write_results_csv(results_path("result_compare_algorythm", support), file_name, results)
 
 def main():
-    transactions = load_transactions_from_csv(FILE_PATH)
-    if not transactions:
-        print(f"[BŁĄD] Nie udało się wczytać pliku {FILE_PATH}")
+    # Własne implementacje czytają zakodowany magazyn CSR - konwersja raz, przed próbami
+    try:
+        open_store(FILE_PATH)
+    except (OSError, ValueError) as e:
+        print(f"[BŁĄD] Nie udało się wczytać pliku {FILE_PATH}: {e}")
         return
-    
+    cache = ResultCache() if USE_CACHE else None
+    fingerprint = cache.fingerprint(FILE_PATH) if cache else None
+
     print(f"Test na pliku: {FILE_PATH} przy progu wsparcia: {SUPPORT_THRESHOLD:.2f}")
     results = []
-    results.append(run_algorithm("FPGrowth", fpgrowth, transactions, SUPPORT_THRESHOLD))
-    results.append(run_algorithm("Apriori", apriori, transactions, SUPPORT_THRESHOLD))
-    results.append(run_algorithm("Eclat", eclat, transactions, SUPPORT_THRESHOLD))
+    results.append(run_cached(cache, fingerprint, "FPGrowth", fpgrowth, FILE_PATH, SUPPORT_THRESHOLD))
+    results.append(run_cached(cache, fingerprint, "Apriori", apriori, FILE_PATH, SUPPORT_THRESHOLD))
+    results.append(run_cached(cache, fingerprint, "Eclat", eclat, FILE_PATH, SUPPORT_THRESHOLD))
     
       # Twoje własne implementacje
-    results.append(run_algorithm("Apriori_Own", apriori_own, transactions, SUPPORT_THRESHOLD))
-    results.append(run_algorithm("Eclat_Own", own_eclat, transactions, SUPPORT_THRESHOLD))
-    results.append(run_algorithm("FPGrowth_Own", build_fptree, transactions, SUPPORT_THRESHOLD))
+    results.append(run_cached(cache, fingerprint, "Apriori_Own", apriori_own, FILE_PATH, SUPPORT_THRESHOLD, WORKERS))
+    results.append(run_cached(cache, fingerprint, "Eclat_Own", eclat_own, FILE_PATH, SUPPORT_THRESHOLD, WORKERS))
+    results.append(run_cached(cache, fingerprint, "FPGrowth_Own", fpgrowth_own, FILE_PATH, SUPPORT_THRESHOLD, WORKERS))
 
     save_results_to_csv(os.path.basename(FILE_PATH), SUPPORT_THRESHOLD, results)
     print("Wyniki zapisane do pliku.")
@@ -1,34 +1,250 @@
-import itertools
-import pandas as pd
+from multiprocessing import Pool
 
+import numpy as np
 
-def preprocess(transactions):
+from bitmap import WORD_BITS, csr_arrays, num_words, popcount
+from encoding import encode_transactions
+
+# Bitmapa kosztuje n/8 bajtów, tablica int32 - 4 bajty na tid, więc powyżej
+# gęstości 1/32 bitmapa jest mniejsza (i szybsza w przecięciach)
+DENSE_THRESHOLD = 1 / 32
+# Średnia gęstość częstych przedmiotów, od której tryb "auto" wybiera dyfsety
+AUTO_DIFFSET_DENSITY = 0.5
+
+
+class TidList:
+    """Lista tid przedmiotu: posortowana tablica int32 (rzadkie) albo bitmapa uint64 (gęste).
+
+    Reprezentacja wybierana jest wg gęstości przy każdym utworzeniu;
+    `len()` zwraca wsparcie, a `&` przecina dwie listy dowolnego rodzaju.
+    """
+
+    __slots__ = ("tids", "bits", "count", "num_transactions")
+
+    def __init__(self, tids, bits, count, num_transactions):
+        self.tids = tids
+        self.bits = bits
+        self.count = count
+        self.num_transactions = num_transactions
+
+    @classmethod
+    def from_tids(cls, tids, num_transactions):
+        count = len(tids)
+        if count > num_transactions * DENSE_THRESHOLD:
+            tids = np.asarray(tids, dtype=np.int64)
+            bits = np.zeros(num_words(num_transactions), dtype=np.uint64)
+            np.bitwise_or.at(bits, tids >> 6, np.left_shift(np.uint64(1), (tids & 63).astype(np.uint64)))
+            return cls(None, bits, count, num_transactions)
+        return cls(np.asarray(tids, dtype=np.int32), None, count, num_transactions)
+
+    @classmethod
+    def from_bits(cls, bits, num_transactions):
+        count = int(popcount(bits))
+        if count > num_transactions * DENSE_THRESHOLD:
+            return cls(None, bits, count, num_transactions)
+        flags = np.unpackbits(bits.view(np.uint8), bitorder='little')
+        return cls(np.flatnonzero(flags).astype(np.int32), None, count, num_transactions)
+
+    def __len__(self):
+        return self.count
+
+    def __and__(self, other):
+        n = self.num_transactions
+        if self.bits is not None and other.bits is not None:
+            return TidList.from_bits(self.bits & other.bits, n)
+        if self.tids is not None and other.tids is not None:
+            # Wyszukiwanie binarne krótszej listy w dłuższej: O(a log b)
+            small, large = (self, other) if self.count <= other.count else (other, self)
+            return TidList.from_tids(small.tids[large._contains(small.tids)], n)
+        sparse, dense = (self, other) if self.tids is not None else (other, self)
+        return TidList.from_tids(sparse.tids[dense._contains(sparse.tids)], n)
+
+    def __sub__(self, other):
+        """Różnica zbiorów tid (dEclat): tid z self, których nie ma w other."""
+        n = self.num_transactions
+        if self.bits is not None and other.bits is not None:
+            return TidList.from_bits(self.bits & ~other.bits, n)
+        if self.bits is not None:
+            tids = other.tids.astype(np.int64)
+            bits = self.bits.copy()
+            np.bitwise_and.at(bits, tids >> 6, ~np.left_shift(np.uint64(1), (tids & 63).astype(np.uint64)))
+            return TidList.from_bits(bits, n)
+        return TidList.from_tids(self.tids[~other._contains(self.tids)], n)
+
+    def _contains(self, tids):
+        # Maska: które z podanych (posortowanych) tid należą do tej listy
+        if self.bits is not None:
+            hit = (self.bits[tids >> 6] >> (tids & (WORD_BITS - 1)).astype(np.uint64)) & np.uint64(1)
+            return hit.astype(bool)
+        if not len(self.tids):
+            return np.zeros(len(tids), dtype=bool)
+        pos = np.minimum(np.searchsorted(self.tids, tids), len(self.tids) - 1)
+        return self.tids[pos] == tids
+
+
+def preprocess(transactions, min_count=0):
+    """Baza pionowa {id przedmiotu: TidList} dla przedmiotów o wsparciu >= min_count."""
+    rows, items = csr_arrays(transactions)
+    n = len(transactions)
+    # Stabilne sortowanie po przedmiocie zachowuje rosnące tid w każdej grupie
+    order = np.argsort(items, kind='stable')
+    tids = rows[order]
+    counts = np.bincount(items, minlength=1)
+    bounds = np.concatenate(([0], np.cumsum(counts)))
     data = {}
-    for tid, transaction in enumerate(transactions):
-        for item in transaction:
-            if item not in data:
-                data[item] = set()
-            data[item].add(tid)
+    for item, count in enumerate(counts.tolist()):
+        if count and count >= min_count:
+            data[item] = TidList.from_tids(tids[bounds[item]:bounds[item + 1]], n)
     return data
 
-FreqItems = {}
+def _extend(iset, isupp, members, minsup_count, diffsets, is_diff):
+    # Sufiks klasy prefiksu P+i: (j, tidset albo dyfset, wsparcie) dla częstych P+i+j
+    suffix = []
+    for j, jset, jsupp in members:
+        if not diffsets:
+            tids = iset & jset
+            supp = len(tids)
+        else:
+            # Pierwszy poziom: d(ij) = t(i) - t(j); głębiej: d(PXY) = d(PY) - d(PX)
+            tids = jset - iset if is_diff else iset - jset
+            supp = isupp - len(tids)
+        if supp >= minsup_count:
+            suffix.append((j, tids, supp))
+    suffix.sort(key=lambda x: x[2], reverse=True)
+    return suffix
+
+
+def _walk(stack, minsup_count, diffsets):
+    # Jawny stos ramek (prefiks, członkowie klasy, czy członkowie to dyfsety)
+    while stack:
+        prefix, members, is_diff = stack[-1]
+        if not members:
+            stack.pop()
+            continue
+        i, iset, isupp = members.pop()
+        if isupp < minsup_count:
+            continue
+        itemset = prefix + (i,)
+        yield itemset, isupp
+        suffix = _extend(iset, isupp, members, minsup_count, diffsets, is_diff)
+        if suffix:
+            stack.append((itemset, suffix, diffsets))
+
+
+def iter_eclat(items, minsup_count, diffsets=False, prefix=()):
+    """Iteracyjny Eclat: leniwie zwraca (krotka przedmiotów, wsparcie).
+
+    items to lista (przedmiot, TidList) posortowana malejąco wg wsparcia.
+    Przy diffsets=True poniżej pierwszego poziomu węzły trzymają dyfsety
+    (tid utracone względem rodzica), a wsparcie liczone jest odejmowaniem.
+    Stos jest jawny, więc długość wzorców nie jest ograniczona limitem rekurencji.
+    """
+    members = [(i, tids, len(tids)) for i, tids in items]
+    return _walk([(tuple(prefix), members, False)], minsup_count, diffsets)
+
 
 def eclat(prefix, items, minsup_count, freq_items=None):
     if freq_items is None:
         freq_items = {}
+    for itemset, support in iter_eclat(items, minsup_count, prefix=prefix):
+        freq_items[frozenset(itemset)] = support
+    return freq_items
 
-    while items:
-        i, itids = items.pop()
-        isupp = len(itids)
-        if isupp >= minsup_count:
-            freq_items[frozenset(prefix + [i])] = isupp
-            suffix = []
-            for j, ojtids in items:
-                jtids = itids & ojtids
-                if len(jtids) >= minsup_count:
-                    suffix.append((j, jtids))
-            eclat(prefix + [i], sorted(suffix, key=lambda x: len(x[1]), reverse=True), minsup_count, freq_items)
 
+def eclat_diffset(prefix, items, minsup_count, freq_items=None):
+    """dEclat: jak eclat(), ale poniżej pierwszego poziomu węzły trzymają dyfsety."""
+    if freq_items is None:
+        freq_items = {}
+    for itemset, support in iter_eclat(items, minsup_count, diffsets=True, prefix=prefix):
+        freq_items[frozenset(itemset)] = support
     return freq_items
 
 
+def iter_top_class(items, index, minsup_count, diffsets=False):
+    """Zwraca wzorce klasy prefiksu items[index]; sufiks to items[:index] (jak przy pop()).
+
+    Klasy najwyższego poziomu są niezależne, więc każdą można liczyć w osobnym procesie.
+    """
+    i, itids = items[index]
+    isupp = len(itids)
+    if isupp < minsup_count:
+        return
+    yield (i,), isupp
+    members = [(j, tids, len(tids)) for j, tids in items[:index]]
+    suffix = _extend(itids, isupp, members, minsup_count, diffsets, False)
+    yield from _walk([((i,), suffix, diffsets)], minsup_count, diffsets)
+
+
+def mine_top_class(items, index, minsup_count, diffsets=False):
+    """Słownik {frozenset id: wsparcie} jednej klasy najwyższego poziomu."""
+    return {frozenset(itemset): support for itemset, support in iter_top_class(items, index, minsup_count, diffsets)}
+
+
+# Stan procesu roboczego: baza pionowa przekazana raz przez initializer puli
+_worker_items = None
+
+
+def _init_class_worker(items, minsup_count, diffsets):
+    global _worker_items
+    _worker_items = (items, minsup_count, diffsets)
+
+
+def _mine_class_task(index):
+    items, minsup_count, diffsets = _worker_items
+    return mine_top_class(items, index, minsup_count, diffsets)
+
+
+def eclat_parallel(items, minsup_count, workers, diffsets=False):
+    """Eclat w puli procesów: jedno zadanie na klasę najwyższego poziomu.
+
+    Koszt klasy szacowany jest jako wsparcie prefiksu razy długość sufiksu;
+    najdroższe klasy startują pierwsze, wyniki scalane są do jednego słownika.
+    """
+    order = sorted(range(len(items)), key=lambda index: len(items[index][1]) * index, reverse=True)
+    freq_items = {}
+    with Pool(workers, initializer=_init_class_worker, initargs=(items, minsup_count, diffsets)) as pool:
+        for class_items in pool.imap_unordered(_mine_class_task, order):
+            freq_items.update(class_items)
+    return freq_items
+
+
+def _vertical_items(encoded, min_supp, mode):
+    minsup_count = int(min_supp * len(encoded))
+    data = preprocess(encoded, minsup_count)
+    if mode == "auto":
+        density = sum(len(tids) for tids in data.values()) / (len(data) * len(encoded)) if data else 0
+        mode = "diffset" if density >= AUTO_DIFFSET_DENSITY else "tidset"
+    items = sorted(data.items(), key=lambda item: len(item[1]), reverse=True)
+    return items, minsup_count, mode == "diffset"
+
+
+def iter_eclat_own(transactions, min_supp, mode="tidset"):
+    """Strumieniowy Eclat: leniwie zwraca (frozenset etykiet, wsparcie) bez budowania słownika."""
+    if not transactions or not (0 < min_supp <= 1):
+        return
+    if mode not in ("tidset", "diffset", "auto"):
+        raise ValueError(f"Nieznany tryb Eclat: {mode}")
+
+    encoded, vocabulary = encode_transactions(transactions)
+    items, minsup_count, diffsets = _vertical_items(encoded, min_supp, mode)
+    for itemset, support in iter_eclat(items, minsup_count, diffsets):
+        yield vocabulary.decode(itemset), support
+
+
+def eclat_own(transactions, min_supp, mode="tidset", workers=1):
+    """Eclat na transakcjach zakodowanych do id; zwraca {frozenset etykiet: wsparcie}.
+
+    mode: "tidset" (klasyczny), "diffset" (dEclat) albo "auto" - dyfsety,
+    gdy średnia gęstość częstych przedmiotów >= AUTO_DIFFSET_DENSITY.
+    Przy workers > 1 klasy najwyższego poziomu liczone są w puli procesów.
+    """
+    if workers <= 1:
+        return dict(iter_eclat_own(transactions, min_supp, mode))
+    if not transactions or not (0 < min_supp <= 1):
+        return {}
+    if mode not in ("tidset", "diffset", "auto"):
+        raise ValueError(f"Nieznany tryb Eclat: {mode}")
+
+    encoded, vocabulary = encode_transactions(transactions)
+    items, minsup_count, diffsets = _vertical_items(encoded, min_supp, mode)
+    return vocabulary.decode_itemsets(eclat_parallel(items, minsup_count, workers, diffsets))
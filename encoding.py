@@ -0,0 +1,51 @@
+from collections import Counter
+
+
+class ItemVocabulary:
+    """Słownik przedmiotów: etykieta <-> gęsty identyfikator całkowity.
+
+    Identyfikatory nadawane są wg malejącej częstości (0 = najczęstszy przedmiot),
+    więc rosnący porządek id jest jednocześnie porządkiem wstawiania do FP-drzewa.
+    """
+
+    def __init__(self, labels, counts):
+        self.labels = list(labels)
+        self.counts = list(counts)
+        self.ids = {label: i for i, label in enumerate(self.labels)}
+
+    @classmethod
+    def from_counts(cls, item_counts):
+        """Buduje słownik z histogramu {etykieta: liczność}."""
+        ranked = sorted(item_counts.items(), key=lambda x: (-x[1], x[0]))
+        return cls([label for label, _ in ranked], [count for _, count in ranked])
+
+    def __len__(self):
+        return len(self.labels)
+
+    def encode(self, transaction):
+        """Zamienia transakcję na posortowaną listę id (bez powtórzeń)."""
+        ids = self.ids
+        return sorted({ids[item] for item in transaction})
+
+    def decode(self, itemset):
+        """Zamienia zbiór id z powrotem na frozenset etykiet."""
+        labels = self.labels
+        return frozenset(labels[i] for i in itemset)
+
+    def decode_itemsets(self, itemsets):
+        """Dekoduje słownik {zbiór id: wsparcie} wynikowy algorytmu."""
+        return {self.decode(itemset): support for itemset, support in itemsets.items()}
+
+
+def encode_transactions(transactions):
+    """Koduje transakcje na listy id; zwraca (zakodowane transakcje, słownik).
+
+    Magazyn CSR (store.TransactionStore) jest już zakodowany - zwracany bez kopiowania.
+    """
+    if hasattr(transactions, "vocabulary"):
+        return transactions, transactions.vocabulary
+    item_counts = Counter()
+    for transaction in transactions:
+        item_counts.update(set(transaction))
+    vocabulary = ItemVocabulary.from_counts(item_counts)
+    return [vocabulary.encode(transaction) for transaction in transactions], vocabulary
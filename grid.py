@@ -0,0 +1,126 @@
+import csv
+import glob
+import os
+import re
+import sys
+from multiprocessing import Pool, Queue
+
+from fim import fpgrowth, apriori, eclat
+
+import main
+from cache import ResultCache, cache_lookup, measurement_params, store_measurement
+
+ALGORITHMS = {"FPGrowth": fpgrowth, "Apriori": apriori, "Eclat": eclat}
+CONCURRENCY = os.cpu_count() or 1  # Ile komórek siatki mierzymy naraz (każda na własnym rdzeniu)
+RESULTS_PATTERN = "results_support_*.csv"  # Wcześniejsze wyniki (także starsze układy kolumn) - źródło szacunków kosztu
+RESULTS_NAME = re.compile(r"results_support_(\d+(?:\.\d+)?)(?:_v\d+)?\.csv$")
+
+
+def available_cpus():
+    return sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+
+
+def past_costs(pattern=RESULTS_PATTERN):
+    """{(plik, algorytm, próg): czas} z wcześniejszych plików results_support_*.csv (ostatni pomiar wygrywa).
+
+    Wiersze wyprowadzone z niższego progu (kolumna "Pomiar z progu") nie są kosztem tej komórki.
+    """
+    costs = {}
+    # Pliki bez wersji (starszy układ, ta sama kolumna czasu) przed wersjonowanymi - nowsze pomiary wygrywają
+    for path in sorted(glob.glob(pattern), key=lambda path: ("_v" in os.path.basename(path), path)):
+        match = RESULTS_NAME.match(os.path.basename(path))
+        if match is None:
+            continue
+        support = round(float(match.group(1)), 2)
+        # Starsze pliki mają nagłówek w innym kodowaniu - liczy się tylko treść wierszy
+        with open(path, newline='', errors='replace') as f:
+            for row in csv.reader(f):
+                if len(row) < 3 or row[0] == "Plik" or (len(row) > 9 and row[9]):
+                    continue
+                try:
+                    costs[(row[0], row[1], support)] = float(row[2])
+                except ValueError:
+                    continue
+    return costs
+
+
+def estimate_costs(cells, history):
+    """Szacowany czas każdej komórki (plik, algorytm, próg).
+
+    Znane komórki biorą czas z historii; pozostałe - rozmiar pliku / próg,
+    przeskalowany średnią sekund na tę jednostkę ze znanych komórek.
+    """
+    def raw(cell):
+        file_path, _, support = cell
+        return os.path.getsize(file_path) / support
+
+    known = [(history[key], raw(cell)) for cell in cells
+             if (key := (os.path.basename(cell[0]), cell[1], round(cell[2], 2))) in history]
+    scale = sum(t for t, _ in known) / sum(r for _, r in known) if known and sum(r for _, r in known) else 1.0
+    return {cell: history.get((os.path.basename(cell[0]), cell[1], round(cell[2], 2)), raw(cell) * scale)
+            for cell in cells}
+
+
+# Stan procesu roboczego: przypisany rdzeń (procesy potomne prób dziedziczą maskę)
+_worker_cpu = None
+
+
+def _init_grid_worker(cpus):
+    global _worker_cpu
+    _worker_cpu = cpus.get()
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {_worker_cpu})
+
+
+def _run_cell(task):
+    file_path, name, support, runs, keep_result = task
+    res = main.run_algorithm_multiple_times(name, ALGORITHMS[name], file_path, support, runs, keep_result)
+    return file_path, name, support, res
+
+
+def run_grid(files, algorithms, supports, runs=main.NUM_RUNS, concurrency=CONCURRENCY, use_cache=main.USE_CACHE):
+    """Mierzy siatkę pliki x algorytmy x progi w puli procesów i dopisuje wiersze do CSV na bieżąco.
+
+    Każdy proces puli jest przypięty do innego rdzenia, a liczba równoczesnych
+    komórek nie przekracza concurrency (ani liczby dostępnych rdzeni), więc
+    pomiary nie konkurują o procesor. Komórki startują od najdroższych wg
+    szacunków z poprzednich wyników; trafienia w pamięci podręcznej zapisywane są od razu.
+    """
+    cache = ResultCache() if use_cache else None
+    params = measurement_params(runs, main.WARMUP_RUNS)
+    cells = []
+    for file_path in files:
+        fingerprint = cache.fingerprint(file_path) if cache else None
+        for name in algorithms:
+            for support in supports:
+                res = cache_lookup(cache, fingerprint, name, params, support) if cache else None
+                if res is not None:
+                    main.save_results_to_csv(support, [res], os.path.basename(file_path), separator=False)
+                else:
+                    cells.append((file_path, name, support))
+    if not cells:
+        return
+
+    costs = estimate_costs(cells, past_costs())
+    cells.sort(key=lambda cell: costs[cell], reverse=True)
+    cpus = available_cpus()
+    concurrency = max(1, min(concurrency, len(cpus), len(cells)))
+    cpu_queue = Queue()
+    for cpu in cpus[:concurrency]:
+        cpu_queue.put(cpu)
+
+    tasks = [(file_path, name, support, runs, cache is not None) for file_path, name, support in cells]
+    with Pool(concurrency, initializer=_init_grid_worker, initargs=(cpu_queue,)) as pool:
+        for done, (file_path, name, support, res) in enumerate(pool.imap_unordered(_run_cell, tasks), 1):
+            print(f"[{done}/{len(tasks)}] {os.path.basename(file_path)} {name} {support:.2f}")
+            if res is None:
+                continue
+            fingerprint = cache.fingerprint(file_path) if cache is not None else None
+            store_measurement(cache, fingerprint, name, params, file_path, support, res, main.history())
+            main.save_results_to_csv(support, [res], os.path.basename(file_path), separator=False)
+
+
+if __name__ == "__main__":
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else CONCURRENCY
+    files = sorted(os.path.join(main.FOLDER_PATH, name) for name in os.listdir(main.FOLDER_PATH) if name.endswith('.csv'))
+    run_grid(files, list(ALGORITHMS), main.SUPPORT_THRESHOLDS, concurrency=concurrency)
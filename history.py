@@ -0,0 +1,242 @@
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import OrderedDict
+from statistics import median
+
+from cache import file_fingerprint
+
+HISTORY_PATH = "./results_history.jsonl"
+ALPHA = 0.05  # Poziom istotności testu Manna-Whitneya
+MIN_CHANGE = 0.10  # Minimalna względna zmiana mediany uznawana za regresję (10%)
+EXACT_LIMIT = 400  # Do tylu par (n1 * n2) rozkład U liczony dokładnie, powyżej - przybliżenie normalne
+
+
+def machine_info():
+    return {
+        "host": platform.node(),
+        "system": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+    }
+
+
+def git_revision():
+    """Bieżąca rewizja git repozytorium z kodem (z dopiskiem -dirty przy niezatwierdzonych zmianach) albo None."""
+    repo = os.path.dirname(os.path.abspath(__file__))
+    try:
+        rev = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                             cwd=repo).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, check=True, cwd=repo).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return rev + ("-dirty" if dirty else "")
+
+
+def new_run_id():
+    """Identyfikator uruchomienia: czas startu i skrócona rewizja."""
+    rev = git_revision()
+    return time.strftime("%Y%m%d-%H%M%S") + (f"-{rev[:8]}" if rev else "")
+
+
+class History:
+    """Historia pomiarów w pliku JSON Lines - jeden rekord na komórkę (plik, algorytm, próg).
+
+    Rekord zawiera surowe próbki czasu i pamięci, odcisk zbioru danych,
+    rewizję git i opis maszyny, więc uruchomienia można porównywać później.
+    """
+
+    def __init__(self, path=HISTORY_PATH, run_id=None):
+        self.path = path
+        self.run_id = run_id or new_run_id()
+        self._context = None
+        self._fingerprints = {}
+
+    def record(self, res, file_path, support, fingerprint=None, params=None):
+        """Dopisuje wynik bench.benchmark (z surowymi próbkami) do historii."""
+        if res is None or "samples" not in res:
+            return
+        if self._context is None:
+            self._context = {"machine": machine_info(), "git": git_revision()}
+        if fingerprint is None:
+            if file_path not in self._fingerprints:
+                self._fingerprints[file_path] = file_fingerprint(file_path)
+            fingerprint = self._fingerprints[file_path]
+        entry = {
+            "run_id": self.run_id,
+            "timestamp": time.time(),
+            **self._context,
+            "file": os.path.basename(file_path),
+            "fingerprint": fingerprint,
+            "algorithm": res["algorithm"],
+            "support": support,
+            "params": params or {},
+            "samples": res["samples"],
+            "memory_samples": res["memory_samples"],
+            "itemsets": res["avg_itemsets"],
+        }
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+_default_history = None
+
+
+def default_history():
+    """Wspólna historia bieżącego procesu - jeden run_id na całe uruchomienie raportu."""
+    global _default_history
+    if _default_history is None:
+        _default_history = History()
+    return _default_history
+
+
+def load_history(path=HISTORY_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def runs(entries):
+    """{run_id: rekordy} w kolejności zapisu."""
+    grouped = OrderedDict()
+    for entry in entries:
+        grouped.setdefault(entry["run_id"], []).append(entry)
+    return grouped
+
+
+def _ranks(values):
+    # Rangi średnie dla remisów
+    order = sorted(range(len(values)), key=values.__getitem__)
+    ranks = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        i = j + 1
+    return ranks
+
+
+def _exact_upper_tail(u, n1, n2):
+    # P(U >= u) przy H0: liczba układów z sumą "wygranych" >= u (rekurencja po ostatnim elemencie)
+    counts = {(0, 0): [1]}
+
+    def dist(a, b):
+        if (a, b) not in counts:
+            result = [0] * (a * b + 1)
+            if a:
+                for s, c in enumerate(dist(a - 1, b)):
+                    result[s + b] += c  # Ostatni (największy) element z pierwszej próbki wygrywa z b
+            if b:
+                for s, c in enumerate(dist(a, b - 1)):
+                    result[s] += c
+            counts[(a, b)] = result
+        return counts[(a, b)]
+
+    d = dist(n1, n2)
+    return sum(d[math.ceil(u):]) / sum(d)
+
+
+def mann_whitney_greater(x, y):
+    """Jednostronny test Manna-Whitneya: p-wartość hipotezy, że x jest stochastycznie większe od y.
+
+    Dla małych prób bez remisów rozkład U liczony jest dokładnie,
+    w przeciwnym razie - przybliżenie normalne z poprawką na remisy i ciągłość.
+    """
+    n1, n2 = len(x), len(y)
+    if not n1 or not n2:
+        return 1.0
+    ranks = _ranks(list(x) + list(y))
+    u = sum(ranks[:n1]) - n1 * (n1 + 1) / 2
+    ties = len(set(x) | set(y)) < n1 + n2
+    if not ties and n1 * n2 <= EXACT_LIMIT:
+        return _exact_upper_tail(u, n1, n2)
+    n = n1 + n2
+    tie_sizes = {}
+    for value in list(x) + list(y):
+        tie_sizes[value] = tie_sizes.get(value, 0) + 1
+    tie_term = sum(t ** 3 - t for t in tie_sizes.values()) / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term))
+    if sigma == 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / sigma
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def compare_runs(baseline, candidate, alpha=ALPHA, min_change=MIN_CHANGE):
+    """Porównuje komórki obecne w obu uruchomieniach; zwraca listę wierszy raportu.
+
+    Regresja to istotny (p <= alpha) wzrost czasu albo pamięci o co najmniej min_change mediany.
+    """
+    def key(entry):
+        return entry["fingerprint"] or entry["file"], entry["algorithm"], entry["support"], \
+            json.dumps(entry["params"], sort_keys=True)
+
+    base = {key(entry): entry for entry in baseline}
+    rows = []
+    for entry in candidate:
+        old = base.get(key(entry))
+        if old is None:
+            continue
+        for metric, field in (("czas", "samples"), ("pamięć", "memory_samples")):
+            before, after = old[field], entry[field]
+            if not before or not after:
+                continue
+            m_before, m_after = median(before), median(after)
+            change = (m_after - m_before) / m_before if m_before else (math.inf if m_after > 0 else 0.0)
+            p = mann_whitney_greater(after, before)
+            rows.append({
+                "file": entry["file"], "algorithm": entry["algorithm"], "support": entry["support"],
+                "metric": metric, "before": m_before, "after": m_after, "change": change, "p": p,
+                "regression": p <= alpha and change >= min_change,
+            })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Historia pomiarów i wykrywanie regresji")
+    parser.add_argument("--path", default=HISTORY_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="lista zapisanych uruchomień")
+    compare = commands.add_parser("compare", help="porównanie uruchomienia z bazowym")
+    compare.add_argument("baseline", help="run_id bazowy")
+    compare.add_argument("candidate", nargs="?", help="run_id porównywany (domyślnie ostatni)")
+    compare.add_argument("--alpha", type=float, default=ALPHA)
+    compare.add_argument("--min-change", type=float, default=MIN_CHANGE)
+    args = parser.parse_args(argv)
+
+    grouped = runs(load_history(args.path))
+    if args.command == "list":
+        for run_id, entries in grouped.items():
+            print(f"{run_id}  {entries[0]['git']}  {entries[0]['machine']['host']}  {len(entries)} komórek")
+        return 0
+
+    candidate_id = args.candidate or (next(reversed(grouped)) if grouped else None)
+    if args.baseline not in grouped or candidate_id not in grouped:
+        print(f"[BŁĄD] Brak uruchomienia {args.baseline if args.baseline not in grouped else candidate_id} w {args.path}")
+        return 2
+    rows = compare_runs(grouped[args.baseline], grouped[candidate_id], args.alpha, args.min_change)
+    if not rows:
+        print("[BŁĄD] Uruchomienia nie mają wspólnych komórek")
+        return 2
+    for row in rows:
+        flag = "REGRESJA" if row["regression"] else "ok"
+        print(f"{flag:8} {row['file']} {row['algorithm']} {row['support']:.2f} {row['metric']}: "
+              f"{row['before']:.4f} -> {row['after']:.4f} ({row['change']:+.1%}, p={row['p']:.3f})")
+    regressions = sum(row["regression"] for row in rows)
+    print(f"{regressions} regresji ({args.baseline} -> {candidate_id})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
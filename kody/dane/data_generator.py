@@ -162,12 +162,16 @@ def save_validation_stats(stats, filename):
 def validate_itemsets_in_data(transactions, itemsets):
     """
     Waliduje itemsety na podstawie transakcji.
+    Przyjmuje listę transakcji albo magazyn CSR (store.TransactionStore).
     Zwraca listę statystyk dla każdego itemsetu.
     """
     stats = []
     for itemset, prob in itemsets:
-        itemset_set = set(itemset)
-        support_count = sum(1 for t in transactions if itemset_set.issubset(t))
+        if hasattr(transactions, "count_itemset"):
+            support_count = transactions.count_itemset(itemset)
+        else:
+            itemset_set = set(itemset)
+            support_count = sum(1 for t in transactions if itemset_set.issubset(t))
         support = support_count / len(transactions) if transactions else 0
         stats.append({
             "itemset": itemset,
@@ -252,5 +256,6 @@ def generate_multiple_datasets():
 
     return datasets
 
-datasets = generate_multiple_datasets()
+if __name__ == "__main__":
+    datasets = generate_multiple_datasets()
 
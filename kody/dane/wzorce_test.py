@@ -2,11 +2,47 @@ from itertools import combinations
 from collections import defaultdict
 import csv
 
+
+def build_candidate_trie(candidates):
+    """Drzewo prefiksowe kandydatów (posortowanych krotek); liść trzyma indeks kandydata."""
+    root = {}
+    for index, candidate in enumerate(candidates):
+        node = root
+        for item in candidate[:-1]:
+            node = node.setdefault(item, {})
+        node[candidate[-1]] = index
+    return root
+
+
+def _count_in_trie(node, transaction, start, depth, counts):
+    # depth - ile przedmiotów brakuje jeszcze do pełnego kandydata
+    if depth == 1:
+        for item in transaction[start:]:
+            index = node.get(item)
+            if index is not None:
+                counts[index] += 1
+        return
+    for pos in range(start, len(transaction) - depth + 1):
+        child = node.get(transaction[pos])
+        if child is not None:
+            _count_in_trie(child, transaction, pos + 1, depth - 1, counts)
+
+
+def count_candidates(transactions, candidates, k):
+    """Zlicza wsparcie k-elementowych kandydatów; transakcje to posortowane krotki."""
+    trie = build_candidate_trie(candidates)
+    counts = [0] * len(candidates)
+    for transaction in transactions:
+        if len(transaction) >= k:
+            _count_in_trie(trie, transaction, 0, k, counts)
+    return counts
+
+
 def apriori_own(transactions, min_supp, min_length=2):
     if not transactions or not (0 < min_supp <= 1):
         return {}
 
-    transactions = [frozenset(t) for t in transactions]
+    transactions = [tuple(sorted(set(t))) for t in transactions]
     min_count = len(transactions) * min_supp
     item_counts = defaultdict(int)
 
@@ -42,13 +78,10 @@ def apriori_own(transactions, min_supp, min_length=2):
         if not candidates:
             break
 
-        candidate_counts = defaultdict(int)
-        for transaction in transactions:
-            for candidate in candidates:
-                if candidate.issubset(transaction):
-                    candidate_counts[candidate] += 1
+        candidates = [tuple(sorted(candidate)) for candidate in candidates]
+        candidate_counts = count_candidates(transactions, candidates, k)
 
-        new_frequent = {itemset: count for itemset, count in candidate_counts.items() if count >= min_count}
+        new_frequent = {frozenset(itemset): count for itemset, count in zip(candidates, candidate_counts) if count >= min_count}
         if not new_frequent:
             break
         frequent_itemsets.update(new_frequent)
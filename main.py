@@ -1,85 +1,87 @@
-import csv
-import time
-import tracemalloc
 import os
 from fim import fpgrowth, apriori, eclat
-from statistics import mean
+
+from bench import benchmark, results_path, write_results_csv
+from cache import ResultCache, cached_measurement, derive_result, measurement_params
+from history import default_history
 
 # Parametry globalne
 FOLDER_PATH = "./dane/synthetic_data/"
 SUPPORT_THRESHOLDS =[0.05,0.3]#[0.01, 0.05, 0.1, 0.2, 0.3, 0.4] # Lista progów wsparcia
-NUM_RUNS = 10  # Ile razy uruchamiamy każdy algorytm (średnia z pomiarów)
-
-
-def load_transactions_from_csv(file_path):
-    """Wczytuje transakcje z pliku CSV."""
-    try:
-        with open(file_path, 'r', newline='') as csvfile:
-            reader = csv.reader(csvfile)
-            return [
-                [item.strip() for item in row if item.strip()]
-                for row in reader if row
-            ]
-    except Exception as e:
-        print(f"[BŁĄD] Wczytywanie pliku {file_path}: {e}")
-        return None
-
-
-def run_algorithm_multiple_times(name, func, transactions, support, runs=10):
-    """Uruchamia algorytm wielokrotnie i zwraca średnie metryki."""
-    times, memories, itemsets_counts = [], [], []
-
-    for _ in range(runs):
-        try:
-            tracemalloc.start()
-            start_time = time.time()
-
-            result = func(transactions, supp=support * 100)
-
-            end_time = time.time()
-            current, peak = tracemalloc.get_traced_memory()
-            tracemalloc.stop()
-
-            times.append(end_time - start_time)
-            memories.append(peak / (1024 * 1024))  # MB
-            itemsets_counts.append(len(result))
-        except Exception as e:
-            print(f"[BŁĄD] Podczas działania {name}: {e}")
-            return None
-
-    return {
-        "algorithm": name,
-        "avg_time": mean(times),
-        "avg_memory": mean(memories),
-        "avg_itemsets": mean(itemsets_counts)
-    }
-
-
-def save_results_to_csv(support, results, file_name):
-    """Zapisuje wyniki do pliku CSV."""
-    output_path = f"results_support_{support:.2f}.csv"
-    write_header = not os.path.exists(output_path)
-
-    with open(output_path, 'a', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-        if write_header:
-            writer.writerow(["Plik", "Algorytm", "Sr. czas (s)", "Sr. pamięć (MB)", "Sr. liczba zbiorów"])
-
-        for res in results:
-            if res:
-                writer.writerow([
-                    file_name,
-                    res["algorithm"],
-                    f"{res['avg_time']:.4f}",
-                    f"{res['avg_memory']:.2f}",
-                    f"{res['avg_itemsets']:.0f}"
-                ])
-        writer.writerow([])
+NUM_RUNS = 10  # Ile razy uruchamiamy każdy algorytm (mediana z pomiarów)
+SWEEP = True  # Jedno wydobycie przy najniższym progu, wyższe progi przez filtrowanie (czas i pamięć z tego wydobycia)
+USE_CACHE = True  # Wyniki (plik, algorytm, próg) zapamiętywane na dysku między uruchomieniami
+WARMUP_RUNS = 1  # Próby rozgrzewkowe przed pomiarem
+TIMEOUT = 600  # Limit czasu całej komórki - wszystkich prób łącznie (s)
+TRACE_MEMORY = False  # Osobny przebieg z tracemalloc (wolniejszy, nie wpływa na czasy)
+RECORD_HISTORY = True  # Surowe próbki każdego pomiaru dopisywane do results_history.jsonl
+
+
+def run_algorithm_multiple_times(name, func, file_path, support, runs=10, keep_result=False):
+    """Uruchamia algorytm wielokrotnie (każda próba w osobnym procesie) i zwraca statystyki.
+
+    avg_time to mediana czasów perf_counter, avg_memory - mediana przyrostu szczytowego RSS.
+    """
+    return benchmark(name, func, file_path, support, runs, WARMUP_RUNS, TIMEOUT, TRACE_MEMORY,
+                     keep_result=keep_result)
+
+
+def history():
+    """Historia wyników, do której trafiają świeże pomiary (None, gdy wyłączona)."""
+    return default_history() if RECORD_HISTORY else None
+
+
+def run_cached(cache, fingerprint, name, func, file_path, support, runs=10, keep_result=False):
+    """Jak run_algorithm_multiple_times, ale najpierw szuka wyniku w pamięci podręcznej."""
+    measure = lambda keep: run_algorithm_multiple_times(name, func, file_path, support, runs, keep)
+    return cached_measurement(cache, fingerprint, name, measure, file_path, support,
+                              measurement_params(runs, WARMUP_RUNS), history(), keep_result)
+
+
+def run_sweep(name, func, file_path, supports, runs=10, cache=None, fingerprint=None):
+    """Wydobywa raz przy najniższym progu i wyprowadza wyniki dla wszystkich progów.
 
+    Czas i pamięć w każdym wierszu to koszt tego jednego wydobycia - wiersze
+    wyższych progów mają ustawione "derived_from".
+    """
+    lowest = min(supports)
+    base = run_cached(cache, fingerprint, name, func, file_path, lowest, runs, keep_result=True)
+    if base is None:
+        return {support: None for support in supports}
+    return {support: derive_result(base, lowest, support) for support in supports}
+
+
+def save_results_to_csv(support, results, file_name, separator=True):
+    """Zapisuje wyniki do pliku CSV (separator - pusta linia po bloku wyników pliku)."""
+    write_results_csv(results_path("results_support", support), file_name, results, separator)
+
+
+def main_sweep():
+    """Tryb przeglądu progów: każdy plik i algorytm wydobywany raz, przy najniższym progu."""
+    algorithms = [("FPGrowth", fpgrowth), ("Apriori", apriori), ("Eclat", eclat)]
+    cache = ResultCache() if USE_CACHE else None
+    print(f"\n===== PRZEGLĄD PROGÓW WSPARCIA: {', '.join(f'{s:.2f}' for s in SUPPORT_THRESHOLDS)} =====\n")
+
+    for file_name in os.listdir(FOLDER_PATH):
+        if not file_name.endswith('.csv'):
+            continue
+
+        file_path = os.path.join(FOLDER_PATH, file_name)
+        print(f"Plik: {file_name}")
+
+        fingerprint = cache.fingerprint(file_path) if cache else None
+        sweeps = [run_sweep(name, func, file_path, SUPPORT_THRESHOLDS, NUM_RUNS, cache, fingerprint)
+                  for name, func in algorithms]
+        for support in SUPPORT_THRESHOLDS:
+            save_results_to_csv(support, [sweep[support] for sweep in sweeps], file_name)
 
 
 def main():
     """Główna pętla testująca pliki dla różnych progów wsparcia."""
+    if SWEEP:
+        main_sweep()
+        return
+    cache = ResultCache() if USE_CACHE else None
     for support in SUPPORT_THRESHOLDS:
         print(f"\n===== TEST DLA PROGU WSPARCIA: {support:.2f} =====\n")
 
@@ -88,18 +90,13 @@ def main():
                 continue
 
             file_path = os.path.join(FOLDER_PATH, file_name)
-            transactions = load_transactions_from_csv(file_path)
-
-            if not transactions:
-                print(f"[POMINIĘTO] {file_name} — błąd odczytu.")
-                continue
-
             print(f"Plik: {file_name}")
 
+            fingerprint = cache.fingerprint(file_path) if cache else None
             results = []
-            results.append(run_algorithm_multiple_times("FPGrowth", fpgrowth, transactions, support, NUM_RUNS))
-            results.append(run_algorithm_multiple_times("Apriori", apriori, transactions, support, NUM_RUNS))
-            results.append(run_algorithm_multiple_times("Eclat", eclat, transactions, support, NUM_RUNS))
+            results.append(run_cached(cache, fingerprint, "FPGrowth", fpgrowth, file_path, support, NUM_RUNS))
+            results.append(run_cached(cache, fingerprint, "Apriori", apriori, file_path, support, NUM_RUNS))
+            results.append(run_cached(cache, fingerprint, "Eclat", eclat, file_path, support, NUM_RUNS))
 
             save_results_to_csv(support, results, file_name)
 
@@ -1,93 +1,308 @@
+from array import array
 from collections import defaultdict
 import csv
+import math
+import sys
+import time
+from multiprocessing import Pool
 
-class FPNode:
-    def __init__(self, item, count, parent):
-        self.item = item
-        self.count = count
-        self.parent = parent
+from encoding import encode_transactions
+
+ROOT = 0  # Indeks korzenia; 0 oznacza też brak węzła w łańcuchach i nagłówku
+
+
+class FPTree:
+    """FP-drzewo na równoległych tablicach: węzeł to indeks w item/count/parent/link.
+
+    Dzieci wyszukiwane są w jednym słowniku kluczowanym (rodzic << 32 | przedmiot),
+    zamiast osobnego obiektu i słownika na każdy węzeł.
+    """
+
+    __slots__ = ("item", "count", "parent", "link", "children", "single_path", "fp_array")
+
+    def __init__(self):
+        self.item = array('i', [-1])
+        self.count = array('q', [0])
+        self.parent = array('i', [ROOT])
+        self.link = array('i', [ROOT])
         self.children = {}
-        self.link = None
-
-    def increment(self, count):
-        self.count += count
-
-def print_tree(node, indent=0):
-    if node.item is not None:
-        print('  ' * indent + f"{node.item} ({node.count})")
-    for child in node.children.values():
-        print_tree(child, indent + 1)
-
-def build_fptree(transactions, min_support):
-    if not transactions or not (0 <min_support <=1):
-        return None, None 
-    min_count = len(transactions) * min_support
-    item_counts = defaultdict(int)
-    for transaction in transactions:
-        for item in transaction:
-            item_counts[item] += 1
-    item_counts = {item: count for item, count in item_counts.items() if count >= min_count}
-    if not item_counts:
+        # Drzewo jest jedną ścieżką, dopóki każdy nowy węzeł jest dzieckiem poprzednio utworzonego
+        self.single_path = True
+        # FP-array: {przedmiot b: {przedmiot a przed b: wspólne wystąpienia}} albo None
+        self.fp_array = None
+
+    def __len__(self):
+        return len(self.item)
+
+    def child(self, node, item):
+        return self.children.get(node << 32 | item, ROOT)
+
+    def add_node(self, item, count, parent):
+        node = len(self.item)
+        if parent != node - 1:
+            self.single_path = False
+        self.item.append(item)
+        self.count.append(count)
+        self.parent.append(parent)
+        self.link.append(ROOT)
+        self.children[parent << 32 | item] = node
+        return node
+
+    def prefix_path(self, node):
+        """Przedmioty na ścieżce od korzenia do rodzica węzła (rosnące id)."""
+        item, parent_of = self.item, self.parent
+        path = []
+        parent = parent_of[node]
+        while parent != ROOT:
+            path.append(item[parent])
+            parent = parent_of[parent]
+        path.reverse()
+        return path
+
+    def without_children(self):
+        """Płytka kopia bez słownika dzieci (zbędnego do wydobywania baz) - tańsza w przesłaniu."""
+        tree = FPTree.__new__(FPTree)
+        tree.item, tree.count, tree.parent, tree.link = self.item, self.count, self.parent, self.link
+        tree.children = {}
+        tree.single_path = self.single_path
+        tree.fp_array = self.fp_array
+        return tree
+
+
+def print_tree(tree):
+    children = defaultdict(list)
+    for node in range(1, len(tree)):
+        children[tree.parent[node]].append(node)
+    stack = [(node, 0) for node in reversed(children[ROOT])]
+    while stack:
+        node, indent = stack.pop()
+        print('  ' * indent + f"{tree.item[node]} ({tree.count[node]})")
+        stack.extend((child, indent + 1) for child in reversed(children[node]))
+
+def _new_tree(item_counts, min_count):
+    frequent = {item: count for item, count in item_counts.items() if count >= min_count}
+    if not frequent:
         return None, None
-    header_table = {item: [count, None] for item, count in item_counts.items()}
-    root = FPNode(None, 1, None)
-    for transaction in transactions:
-        sorted_items = [item for item in sorted(transaction, key=lambda x: (item_counts.get(x, 0), x), reverse=True) if item in item_counts]
-        if sorted_items:
-            insert_tree(sorted_items, root, header_table)
-
-    return root, header_table
-
-def insert_tree(items, node, header_table):
-    first_item = items[0]
-    if first_item in node.children:
-        node.children[first_item].increment(1)
-    else:
-        new_node = FPNode(first_item, 1, node)
-        node.children[first_item] = new_node
-        update_header_table(new_node, header_table[first_item])
+    # Wpis nagłówka: [wsparcie, pierwszy węzeł łańcucha, ostatni węzeł łańcucha]
+    return FPTree(), {item: [count, ROOT, ROOT] for item, count in frequent.items()}
+
+def _fill_tree(tree, header_table, weighted_paths, fp_array=False):
+    # Id są rangami częstości, a transakcje i ścieżki prefiksowe są już posortowane
+    # rosnąco wg id, więc wystarczy odfiltrować rzadkie przedmioty - bez sortowania
+    pairs = defaultdict(dict) if fp_array else None
+    for path, weight in weighted_paths:
+        items = [item for item in path if item in header_table]
+        if items:
+            insert_tree(items, tree, header_table, weight)
+            if pairs is not None:
+                _count_pairs(pairs, items, weight)
+    # Drzewo-ścieżka jest wydobywane bez baz warunkowych, więc FP-array jest zbędny
+    if pairs is not None and not tree.single_path:
+        tree.fp_array = pairs
+
+def _count_pairs(pairs, items, weight):
+    # Pary (a, b), a przed b na wstawianej ścieżce - wiersz b to histogram bazy warunkowej b
+    for i in range(1, len(items)):
+        row = pairs[items[i]]
+        for item in items[:i]:
+            row[item] = row.get(item, 0) + weight
+
+def build_fptree(transactions, min_count, item_counts=None, fp_array=False):
+    """FP-drzewo z transakcji posortowanych rosnąco wg id (jak z encode_transactions).
+
+    min_count - bezwzględny próg wsparcia, ten sam dla przedmiotów i wzorców.
+    Przy fp_array=True podczas wstawiania liczone są pary przedmiotów (FP-array),
+    dzięki czemu drzewa warunkowe powstają bez przebiegu zliczającego bazę warunkową.
+    """
+    if not transactions:
+        return None, None
+    # Histogram policzony już przy wczytaniu pozwala pominąć przebieg zliczający
+    if item_counts is None:
+        item_counts = defaultdict(int)
+        for transaction in transactions:
+            for item in transaction:
+                item_counts[item] += 1
+    tree, header_table = _new_tree(item_counts, min_count)
+    if tree is not None:
+        _fill_tree(tree, header_table, ((transaction, 1) for transaction in transactions), fp_array)
+    return tree, header_table
+
+def build_conditional_fptree(weighted_paths, min_count, item_counts=None, fp_array=False):
+    """FP-drzewo z par (ścieżka, waga); koszt zależy od liczby różnych ścieżek, nie od wag.
 
+    item_counts (np. wiersz FP-array rodzica) pozwala pominąć przebieg zliczający.
+    """
+    if item_counts is None:
+        item_counts = defaultdict(int)
+        for path, weight in weighted_paths:
+            for item in path:
+                item_counts[item] += weight
+    tree, header_table = _new_tree(item_counts, min_count)
+    if tree is not None:
+        _fill_tree(tree, header_table, weighted_paths, fp_array)
+    return tree, header_table
 
-    if len(items) > 1:
-        insert_tree(items[1:], node.children[first_item], header_table)
+def insert_tree(items, tree, header_table, weight=1, node=ROOT):
+    children, count = tree.children, tree.count
+    for item in items:
+        child = children.get(node << 32 | item, ROOT)
+        if child != ROOT:
+            count[child] += weight
+        else:
+            child = tree.add_node(item, weight, node)
+            update_header_table(tree, child, header_table[item])
+        node = child
 
-def update_header_table(node, header_entry):
-    if header_entry[1] is None:
+def update_header_table(tree, node, header_entry):
+    # Dopisanie na koniec łańcucha w O(1) dzięki wskaźnikowi ogona
+    if header_entry[1] == ROOT:
         header_entry[1] = node
     else:
-        current = header_entry[1]
-        while current.link is not None:
-            current = current.link
-        current.link = node
+        tree.link[header_entry[2]] = node
+    header_entry[2] = node
 
-def find_frequent_patterns(tree, header_table, min_support, num_transactions, prefix=set()):
+def single_path_patterns(tree, prefix, min_count):
+    """Wszystkie kombinacje węzłów drzewa-ścieżki; wsparcie to liczność najgłębszego węzła."""
     patterns = {}
-    min_count = int(num_transactions * min_support)
-
-    for item, (count, node) in sorted(header_table.items(), key=lambda x: x[1][0]):
-        new_prefix = prefix | {item}
-
-        # Dodaj wzorzec, jeśli spełnia próg wsparcia
-        if count >= min_count:
-            patterns[frozenset(new_prefix)] = count
-
-        # Budowanie zbioru warunkowych transakcji
-        conditional_patterns = []
-        while node is not None:
-            path = []
-            parent = node.parent
-            while parent is not None and parent.item is not None:
-                path.append(parent.item)
-                parent = parent.parent
-            for _ in range(node.count):
-                conditional_patterns.append(path)
-            node = node.link
-
-        # Rekurencyjne budowanie poddrzewa
-        subtree, sub_header = build_fptree(conditional_patterns, min_support)
-        if subtree is not None:
-            sub_patterns = find_frequent_patterns(subtree, sub_header, min_support, num_transactions, new_prefix)
-            patterns.update(sub_patterns)
+    combinations = [frozenset(prefix)]
+    for node in range(1, len(tree)):
+        count = tree.count[node]
+        # Liczności na ścieżce nie rosną, więc głębiej nic już nie przejdzie progu
+        if count < min_count:
+            break
+        item = tree.item[node]
+        extended = [combination | {item} for combination in combinations]
+        for combination in extended:
+            patterns[combination] = count
+        combinations.extend(extended)
+    return patterns
+
+def conditional_base(tree, node):
+    """Baza warunkowa łańcucha od węzła: (ścieżka prefiksowa, liczność węzła) na każdy węzeł."""
+    base = []
+    while node != ROOT:
+        base.append((tree.prefix_path(node), tree.count[node]))
+        node = tree.link[node]
+    return base
+
+def mine_item(tree, item, count, node, min_count, prefix=set()):
+    """Wzorce z prefiksem prefix + {item}: sam przedmiot i wynik jego drzewa warunkowego."""
+    new_prefix = prefix | {item}
+    patterns = {}
+
+    # Dodaj wzorzec, jeśli spełnia próg wsparcia
+    if count >= min_count:
+        patterns[frozenset(new_prefix)] = count
+
+    # Budowanie zbioru warunkowych transakcji
+    # (ścieżka prefiksowa, liczność węzła) - jedna para na węzeł zamiast count kopii
+    conditional_patterns = conditional_base(tree, node)
 
+    # Rekurencyjne budowanie poddrzewa (ten sam próg bezwzględny co dla całej bazy);
+    # z FP-array histogram bazy warunkowej jest już znany
+    if tree.fp_array is not None:
+        subtree, sub_header = build_conditional_fptree(
+            conditional_patterns, min_count, tree.fp_array.get(item, {}), fp_array=True)
+    else:
+        subtree, sub_header = build_conditional_fptree(conditional_patterns, min_count)
+    if subtree is not None:
+        patterns.update(find_frequent_patterns(subtree, sub_header, min_count, new_prefix))
+    return patterns
+
+def find_frequent_patterns(tree, header_table, min_count, prefix=set()):
+    if tree.single_path:
+        return single_path_patterns(tree, prefix, min_count)
+
+    patterns = {}
+    for item, (count, node, _) in sorted(header_table.items(), key=lambda x: x[1][0]):
+        patterns.update(mine_item(tree, item, count, node, min_count, prefix))
+    return patterns
+
+
+# Stan procesu roboczego: globalne FP-drzewo przekazane raz przez initializer puli
+_worker_tree = None
+
+
+def _init_tree_worker(tree, min_count):
+    global _worker_tree
+    _worker_tree = (tree, min_count)
+
+
+def _mine_item_task(task):
+    tree, min_count = _worker_tree
+    item, count, node = task
+    return mine_item(tree, item, count, node, min_count)
+
+
+def find_frequent_patterns_parallel(tree, header_table, min_count, workers):
+    """Równoległy FP-growth: bazy warunkowe przedmiotów nagłówka wydobywane w puli procesów.
+
+    Drzewo trafia do każdego procesu raz; przedmioty wysyłane są od największej
+    bazy warunkowej (suma głębokości węzłów łańcucha), żeby jeden duży przedmiot
+    nie zostawił na końcu bezczynnych rdzeni. Wynik jest taki sam jak sekwencyjnie.
+    """
+    if tree.single_path:
+        return find_frequent_patterns(tree, header_table, min_count)
+
+    # Głębokość węzła liczona jednym przebiegiem - rodzic zawsze ma mniejszy indeks
+    depth = array('i', [0]) * len(tree)
+    for node in range(1, len(tree)):
+        depth[node] = depth[tree.parent[node]] + 1
+    costs = {}
+    for item, (_, node, _) in header_table.items():
+        cost = 0
+        while node != ROOT:
+            cost += depth[node]
+            node = tree.link[node]
+        costs[item] = cost
+    tasks = sorted(((item, count, node) for item, (count, node, _) in header_table.items()),
+                   key=lambda task: costs[task[0]], reverse=True)
+
+    # Słownik dzieci nie jest potrzebny do wydobywania baz - przesyłamy kopię bez niego
+    patterns = {}
+    with Pool(workers, initializer=_init_tree_worker,
+              initargs=(tree.without_children(), min_count)) as pool:
+        for item_patterns in pool.imap_unordered(_mine_item_task, tasks):
+            patterns.update(item_patterns)
     return patterns
 
+
+def fpgrowth_own(transactions, min_support, workers=1, fp_array=False):
+    """FP-growth na transakcjach zakodowanych do id; zwraca {frozenset etykiet: wsparcie}.
+
+    Próg bezwzględny ceil(n * s) liczony jest raz i dotyczy przedmiotów i wzorców;
+    workers > 1 wydobywa przedmioty nagłówka w puli procesów, a fp_array=True włącza
+    technikę FP-array (opłacalna głównie dla długich transakcji o małej liczbie różnych ścieżek).
+    """
+    if not (0 < min_support <= 1):
+        return {}
+    encoded, vocabulary = encode_transactions(transactions)
+    min_count = math.ceil(len(encoded) * min_support)
+    tree, header_table = build_fptree(encoded, min_count, dict(enumerate(vocabulary.counts)), fp_array)
+    if tree is None:
+        return {}
+    if workers > 1:
+        patterns = find_frequent_patterns_parallel(tree, header_table, min_count, workers)
+    else:
+        patterns = find_frequent_patterns(tree, header_table, min_count)
+    return vocabulary.decode_itemsets(patterns)
+
+
+def measure_build_throughput(transactions, min_support, item_counts=None, repeats=3):
+    """Przepustowość budowy FP-drzewa w transakcjach na sekundę (najlepszy z powtórzeń)."""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        build_fptree(transactions, math.ceil(len(transactions) * min_support), item_counts)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(transactions) / best
+
+
+if __name__ == "__main__":
+    from store import read_csv_store
+
+    for path in sys.argv[1:]:
+        store = read_csv_store(path)
+        rate = measure_build_throughput(list(store), 0.001, dict(enumerate(store.vocabulary.counts)))
+        print(f"{path}: {rate:.0f} transakcji/s")
@@ -0,0 +1,144 @@
+import heapq
+import math
+import os
+import tempfile
+from collections import Counter
+from multiprocessing import Pool
+
+from encoding import ItemVocabulary
+from own import build_conditional_fptree, mine_item
+from store import TransactionStream
+
+
+def shard_csv(csv_path, shard_dir, num_shards):
+    """Dzieli plik CSV na num_shards plików (wiersze rozdzielane po kolei), bez wczytywania całości."""
+    os.makedirs(shard_dir, exist_ok=True)
+    paths = [os.path.join(shard_dir, f"shard_{i}.csv") for i in range(num_shards)]
+    files = [open(path, 'w', newline='') for path in paths]
+    try:
+        with open(csv_path, 'r', newline='') as source:
+            for index, line in enumerate(source):
+                files[index % num_shards].write(line)
+    finally:
+        for f in files:
+            f.close()
+    return paths
+
+
+def count_shard(shard_path):
+    """Etap map 1: histogram przedmiotów i liczba transakcji jednego fragmentu."""
+    stream = TransactionStream(shard_path)
+    num_transactions = sum(len(chunk) for chunk in stream)
+    return stream.item_counts, num_transactions
+
+
+def group_items(item_counts, num_groups):
+    """Przydział id przedmiotów do grup - zachłannie, najczęstsze do najlżejszej grupy."""
+    loads = [(0, group) for group in range(num_groups)]
+    group_of = {}
+    for item, count in sorted(item_counts.items(), key=lambda x: -x[1]):
+        load, group = heapq.heappop(loads)
+        group_of[item] = group
+        heapq.heappush(loads, (load + count, group))
+    return group_of
+
+
+def emit_group_transactions(shard_path, out_dir, shard_index, vocabulary, group_of):
+    """Etap map 2: dla każdej transakcji wysyła do grupy g prefiks do ostatniego przedmiotu z g.
+
+    Prefiks zawiera wszystkie przedmioty poprzedzające (wg rang), więc grupa g
+    ma komplet baz warunkowych swoich przedmiotów. Zwraca ścieżki plików grup.
+    """
+    num_groups = max(group_of.values()) + 1
+    paths = [os.path.join(out_dir, f"group_{g}_shard_{shard_index}.txt") for g in range(num_groups)]
+    files = [open(path, 'w') for path in paths]
+    try:
+        for chunk in TransactionStream(shard_path):
+            for row in chunk:
+                items = sorted(vocabulary.ids[item] for item in row if vocabulary.ids.get(item) in group_of)
+                emitted = set()
+                for j in range(len(items) - 1, -1, -1):
+                    group = group_of[items[j]]
+                    if group not in emitted:
+                        emitted.add(group)
+                        files[group].write(" ".join(map(str, items[:j + 1])) + "\n")
+    finally:
+        for f in files:
+            f.close()
+    return paths
+
+
+def mine_group(group, group_paths, group_of, min_count):
+    """Etap reduce: FP-drzewo z podtransakcji grupy i wzorce kończące się jej przedmiotami."""
+    paths = Counter()
+    for path in group_paths:
+        with open(path) as f:
+            for line in f:
+                paths[tuple(map(int, line.split()))] += 1
+    tree, header_table = build_conditional_fptree(list(paths.items()), min_count)
+    patterns = {}
+    if tree is None:
+        return patterns
+    for item, (count, node, _) in header_table.items():
+        if group_of[item] == group:
+            patterns.update(mine_item(tree, item, count, node, min_count))
+    return patterns
+
+
+def _emit_task(args):
+    return emit_group_transactions(*args)
+
+
+def _mine_task(args):
+    return mine_group(*args)
+
+
+def pfp_own(csv_path, min_support, workers=None, num_groups=None, work_dir=None):
+    """Równoległy FP-growth (PFP) w stylu map/reduce na fragmentach pliku CSV.
+
+    1. podział pliku na fragmenty, 2. liczenie przedmiotów na fragmentach i redukcja,
+    3. podział częstych przedmiotów na grupy, 4. podtransakcje zależne od grupy,
+    5. niezależne wydobywanie grup i scalenie wyników. Żaden proces nie trzyma
+    całej bazy - lokalne procesy grają rolę węzłów klastra.
+    """
+    if not (0 < min_support <= 1):
+        return {}
+    workers = workers or os.cpu_count() or 1
+    num_groups = num_groups or workers
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        shards = shard_csv(csv_path, os.path.join(tmp, "shards"), workers)
+        with Pool(workers) as pool:
+            item_counts, num_transactions = Counter(), 0
+            for counts, n in pool.map(count_shard, shards):
+                item_counts.update(counts)
+                num_transactions += n
+
+            # Ten sam próg co fpgrowth_own: ceil(n * s) dla przedmiotów i wzorców
+            min_count = math.ceil(num_transactions * min_support)
+            vocabulary = ItemVocabulary.from_counts(item_counts)
+            frequent = {vocabulary.ids[item]: count for item, count in item_counts.items() if count >= min_count}
+            if not frequent:
+                return {}
+            group_of = group_items(frequent, num_groups)
+
+            group_dir = os.path.join(tmp, "groups")
+            os.makedirs(group_dir)
+            emitted = pool.map(_emit_task, [(shard, group_dir, i, vocabulary, group_of)
+                                            for i, shard in enumerate(shards)])
+            groups = sorted(set(group_of.values()))
+            tasks = [(g, [paths[g] for paths in emitted], group_of, min_count) for g in groups]
+            patterns = {}
+            for group_patterns in pool.imap_unordered(_mine_task, tasks):
+                patterns.update(group_patterns)
+
+    return vocabulary.decode_itemsets(patterns)
+
+
+if __name__ == "__main__":
+    import sys
+
+    path, support = sys.argv[1], float(sys.argv[2])
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    patterns = pfp_own(path, support, workers)
+    print(f"{path}: {len(patterns)} zbiorów częstych (min_support={support})")
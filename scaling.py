@@ -0,0 +1,149 @@
+import csv
+import importlib.util
+import os
+import random
+import sys
+
+import numpy as np
+from fim import fpgrowth, apriori, eclat
+
+from apriori_own import apriori_own
+from bench import benchmark
+from eclat import eclat_own
+from own import fpgrowth_own
+
+
+def _load_generator():
+    # kody/dane nie jest pakietem - moduł generatora ładowany wprost z pliku
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kody", "dane", "data_generator.py")
+    spec = importlib.util.spec_from_file_location("data_generator", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+SCALING_FOLDER = "./dane/scaling/"
+RESULTS_PATH = "scaling_results.csv"
+EXPONENTS_PATH = "scaling_exponents.csv"
+SUPPORT = 0.05
+NUM_RUNS = 3
+WARMUP_RUNS = 1
+TIMEOUT = 300  # Limit czasu komórki; po przekroczeniu algorytm pomija dalsze (większe) punkty wymiaru
+SEED = 42
+
+# Punkt bazowy; w każdym przebiegu zmienia się tylko jeden wymiar
+BASE = {"num_transactions": 20000, "num_items": 50, "avg_length": 5, "zipf_alpha": 1.1, "num_itemsets": 10}
+SWEEPS = {
+    "num_transactions": [5000, 10000, 20000, 40000, 80000, 160000],
+    "num_items": [20, 50, 100, 200, 500],
+    "avg_length": [3, 5, 7, 9, 11],
+    "zipf_alpha": [0.8, 1.1, 1.5, 2.0, 3.0],
+    "num_itemsets": [0, 5, 10, 20, 40],
+}
+# (nazwa, funkcja, sposób wczytania danych w bench)
+MINERS = [
+    ("FPGrowth", fpgrowth, "list"),
+    ("Apriori", apriori, "list"),
+    ("Eclat", eclat, "list"),
+    ("Apriori_Own", apriori_own, "store"),
+    ("Eclat_Own", eclat_own, "store"),
+    ("FPGrowth_Own", fpgrowth_own, "store"),
+]
+
+
+def dataset_path(config):
+    name = "_".join(f"{key}-{config[key]}" for key in sorted(config))
+    return os.path.join(SCALING_FOLDER, f"scaling_{name}_seed-{SEED}.csv")
+
+
+def generate_dataset(generator, config):
+    """Plik CSV dla konfiguracji (generowany raz, z ustalonym ziarnem)."""
+    path = dataset_path(config)
+    if os.path.exists(path):
+        return path
+    random.seed(SEED)
+    np.random.seed(SEED)
+    itemsets = generator.generate_random_itemsets(
+        config["num_items"], config["num_itemsets"], config["avg_length"], zipf_alpha=config["zipf_alpha"])
+    transactions = generator.generate_data(
+        config["num_transactions"], itemsets, config["num_items"],
+        zipf_alpha=config["zipf_alpha"], avg_len=config["avg_length"])
+    os.makedirs(SCALING_FOLDER, exist_ok=True)
+    generator.save_to_file(transactions, path)
+    return path
+
+
+def growth_exponent(xs, ys):
+    """Nachylenie prostej dopasowanej do (log x, log y): y ~ x^k. None, gdy za mało dodatnich punktów."""
+    points = [(x, y) for x, y in zip(xs, ys) if x > 0 and y is not None and y > 0]
+    if len(points) < 2:
+        return None
+    slope, _ = np.polyfit(np.log([x for x, _ in points]), np.log([y for _, y in points]), 1)
+    return float(slope)
+
+
+def run_dimension(generator, dimension, values, miners=MINERS):
+    """Mierzy wszystkie algorytmy w punktach jednego wymiaru; zwraca {algorytm: [(wartość, wynik)]}."""
+    curves = {name: [] for name, _, _ in miners}
+    stopped = set()
+    for value in values:
+        config = {**BASE, dimension: value}
+        path = generate_dataset(generator, config)
+        print(f"{dimension}={value}: {path}")
+        for name, func, loader in miners:
+            if name in stopped:
+                continue
+            res = benchmark(name, func, path, SUPPORT, NUM_RUNS, WARMUP_RUNS, TIMEOUT, loader=loader)
+            curves[name].append((value, res))
+            if res is None:
+                # Limit czasu lub błąd - dalsze punkty tego wymiaru byłyby jeszcze droższe
+                stopped.add(name)
+    return curves
+
+
+def save_curves(dimension, curves, path=RESULTS_PATH):
+    write_header = not os.path.exists(path)
+    with open(path, 'a', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        if write_header:
+            writer.writerow(["Wymiar", "Wartość", "Algorytm", "Mediana czasu (s)", "Przyrost RSS (MB)",
+                             "Liczba zbiorów"])
+        for name, points in curves.items():
+            for value, res in points:
+                if res is None:
+                    writer.writerow([dimension, value, name, "limit", "", ""])
+                else:
+                    writer.writerow([dimension, value, name, f"{res['avg_time']:.4f}", f"{res['avg_memory']:.2f}",
+                                     res["avg_itemsets"]])
+
+
+def save_exponents(dimension, curves, path=EXPONENTS_PATH):
+    """Wykładniki wzrostu czasu i pamięci względem wymiaru (dopasowanie log-log)."""
+    write_header = not os.path.exists(path)
+    with open(path, 'a', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        if write_header:
+            writer.writerow(["Wymiar", "Algorytm", "Wykładnik czasu", "Wykładnik pamięci", "Ostatni punkt"])
+        for name, points in curves.items():
+            measured = [(value, res) for value, res in points if res is not None]
+            xs = [value for value, _ in measured]
+            time_k = growth_exponent(xs, [res["avg_time"] for _, res in measured])
+            memory_k = growth_exponent(xs, [res["avg_memory"] for _, res in measured])
+            time_k = f"{time_k:.2f}" if time_k is not None else ""
+            memory_k = f"{memory_k:.2f}" if memory_k is not None else ""
+            writer.writerow([dimension, name, time_k, memory_k, xs[-1] if xs else ""])
+            print(f"  {name}: czas ~ {dimension}^{time_k or '?'}, pamięć ~ {dimension}^{memory_k or '?'}")
+
+
+def main(dimensions=None):
+    """Przebiega kolejne wymiary (domyślnie wszystkie z SWEEPS) i zapisuje krzywe oraz wykładniki."""
+    generator = _load_generator()
+    for dimension in dimensions or SWEEPS:
+        print(f"\n===== SKALOWANIE: {dimension} =====\n")
+        curves = run_dimension(generator, dimension, SWEEPS[dimension])
+        save_curves(dimension, curves)
+        save_exponents(dimension, curves)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or None)
@@ -0,0 +1,204 @@
+import csv
+import json
+import os
+import sys
+from collections import Counter
+
+import numpy as np
+
+from encoding import ItemVocabulary
+
+MAGIC = b"FIMCSR01"
+BINARY_FOLDER = "./dane/binary/"
+ITER_CHUNK = 65536  # Ile transakcji dekodujemy naraz przy iteracji
+STREAM_CHUNK = 100000  # Ile transakcji czytamy z CSV w jednej paczce
+
+
+class TransactionStore:
+    """Transakcje w układzie CSR: offsets (int64, n+1) i items (int32, id przedmiotów).
+
+    Transakcja i to items[offsets[i]:offsets[i+1]] - posortowane rosnąco id
+    ze słownika `vocabulary`. Tablice mogą być zwykłe albo zmapowane z pliku.
+    """
+
+    def __init__(self, offsets, items, vocabulary):
+        self.offsets = offsets
+        self.items = items
+        self.vocabulary = vocabulary
+        self._rows = None
+
+    @classmethod
+    def from_transactions(cls, transactions, vocabulary):
+        """Buduje magazyn w pamięci z transakcji zakodowanych słownikiem."""
+        lengths = np.zeros(len(transactions) + 1, dtype=np.int64)
+        items = []
+        for i, transaction in enumerate(transactions):
+            row = vocabulary.encode(transaction)
+            lengths[i + 1] = len(row)
+            items.extend(row)
+        return cls(np.cumsum(lengths), np.asarray(items, dtype=np.int32), vocabulary)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return self.items[self.offsets[index]:self.offsets[index + 1]]
+
+    def __iter__(self):
+        """Zwraca kolejne transakcje jako listy id (dekodowane paczkami)."""
+        offsets, items = self.offsets, self.items
+        n = len(self)
+        for start in range(0, n, ITER_CHUNK):
+            stop = min(start + ITER_CHUNK, n)
+            base = int(offsets[start])
+            chunk = items[base:int(offsets[stop])].tolist()
+            bounds = (offsets[start:stop + 1] - base).tolist()
+            for a, b in zip(bounds, bounds[1:]):
+                yield chunk[a:b]
+
+    def row_index(self):
+        """Numer transakcji dla każdej pozycji tablicy items (liczony raz)."""
+        if self._rows is None:
+            self._rows = np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self.offsets))
+        return self._rows
+
+    def count_itemset(self, itemset):
+        """Liczba transakcji zawierających wszystkie przedmioty (etykiety) itemsetu."""
+        ids = [self.vocabulary.ids.get(item) for item in set(itemset)]
+        if not ids or None in ids:
+            return 0 if ids else len(self)
+        hits = np.bincount(self.row_index()[np.isin(self.items, ids)], minlength=len(self))
+        return int(np.count_nonzero(hits == len(ids)))
+
+
+class TransactionStream:
+    """Strumieniowy czytnik CSV: paczki transakcji i histogram przedmiotów w jednym przebiegu.
+
+    Po pełnej iteracji `item_counts` zawiera liczności wszystkich przedmiotów,
+    więc osobny przebieg zliczający nie jest potrzebny.
+    """
+
+    def __init__(self, file_path, chunk_size=STREAM_CHUNK):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.item_counts = Counter()
+
+    def __iter__(self):
+        self.item_counts = Counter()
+        chunk = []
+        with open(self.file_path, 'r', newline='') as csvfile:
+            for row in csv.reader(csvfile):
+                row = list(dict.fromkeys(item.strip() for item in row if item.strip()))
+                if row:
+                    chunk.append(row)
+                if len(chunk) >= self.chunk_size:
+                    yield self._counted(chunk)
+                    chunk = []
+        if chunk:
+            yield self._counted(chunk)
+
+    def _counted(self, chunk):
+        for row in chunk:
+            self.item_counts.update(row)
+        return chunk
+
+
+def load_transactions_from_csv(file_path):
+    """Wczytuje transakcje z pliku CSV."""
+    try:
+        return [row for chunk in TransactionStream(file_path) for row in chunk]
+    except Exception as e:
+        print(f"[BŁĄD] Wczytywanie pliku {file_path}: {e}")
+        return None
+
+
+def read_csv_store(file_path, chunk_size=STREAM_CHUNK):
+    """Wczytuje CSV do TransactionStore w jednym przebiegu, bez list Pythona dla całego pliku.
+
+    Podczas czytania przedmioty dostają tymczasowe id (kolejność wystąpienia),
+    a po przebiegu są przenumerowane wg częstości jedną operacją wektorową.
+    """
+    stream = TransactionStream(file_path, chunk_size)
+    provisional = {}
+    item_chunks, length_chunks = [], [np.zeros(1, dtype=np.int64)]
+    for chunk in stream:
+        item_chunks.append(np.fromiter(
+            (provisional.setdefault(item, len(provisional)) for row in chunk for item in row), dtype=np.int32))
+        length_chunks.append(np.fromiter((len(row) for row in chunk), dtype=np.int64, count=len(chunk)))
+
+    vocabulary = ItemVocabulary.from_counts(stream.item_counts)
+    remap = np.fromiter((vocabulary.ids[label] for label in provisional), dtype=np.int32, count=len(provisional))
+    offsets = np.cumsum(np.concatenate(length_chunks))
+    items = remap[np.concatenate(item_chunks)] if item_chunks else np.zeros(0, dtype=np.int32)
+    # Sortowanie id wewnątrz każdej transakcji (klucz główny: numer transakcji)
+    rows = np.repeat(np.arange(len(offsets) - 1, dtype=np.int32), np.diff(offsets))
+    items = items[np.lexsort((items, rows))]
+    return TransactionStore(offsets, items, vocabulary)
+
+
+def save_store(store, binary_path):
+    """Zapisuje magazyn do pliku binarnego CSR (nagłówek JSON + offsets + items)."""
+    header = json.dumps({
+        "num_transactions": len(store),
+        "num_entries": int(store.offsets[-1]),
+        "labels": store.vocabulary.labels,
+        "counts": store.vocabulary.counts,
+    }).encode('utf-8')
+    # Tablice wyrównane do 8 bajtów, żeby memmap widział je bez kopiowania
+    header += b" " * (-(len(MAGIC) + 8 + len(header)) % 8)
+
+    os.makedirs(os.path.dirname(binary_path) or ".", exist_ok=True)
+    # Zapis przez plik tymczasowy - przerwana konwersja nie zostawia uciętego pliku nowszego niż CSV
+    tmp_path = binary_path + ".tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(8, 'little'))
+            f.write(header)
+            f.write(np.ascontiguousarray(store.offsets, dtype=np.int64).tobytes())
+            f.write(np.ascontiguousarray(store.items, dtype=np.int32).tobytes())
+        os.replace(tmp_path, binary_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return binary_path
+
+
+def convert_csv_to_binary(csv_path, binary_path):
+    """Jednorazowa konwersja CSV -> plik binarny CSR."""
+    return save_store(read_csv_store(csv_path), binary_path)
+
+
+def load_store(binary_path):
+    """Otwiera plik binarny jako TransactionStore na tablicach zmapowanych z pliku."""
+    with open(binary_path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{binary_path} nie jest plikiem transakcji CSR")
+        header_len = int.from_bytes(f.read(8), 'little')
+        header = json.loads(f.read(header_len))
+    data_start = len(MAGIC) + 8 + header_len
+    n = header["num_transactions"]
+    offsets = np.memmap(binary_path, dtype=np.int64, mode='r', offset=data_start, shape=(n + 1,))
+    items = np.memmap(binary_path, dtype=np.int32, mode='r', offset=data_start + 8 * (n + 1),
+                      shape=(header["num_entries"],))
+    return TransactionStore(offsets, items, ItemVocabulary(header["labels"], header["counts"]))
+
+
+def binary_path_for(csv_path):
+    """Ścieżka pliku binarnego odpowiadającego plikowi CSV."""
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(BINARY_FOLDER, name + ".csr")
+
+
+def open_store(csv_path):
+    """Ładuje magazyn dla CSV, konwertując go przy pierwszym użyciu lub gdy CSV jest nowszy."""
+    binary_path = binary_path_for(csv_path)
+    if not os.path.exists(binary_path) or os.path.getmtime(binary_path) < os.path.getmtime(csv_path):
+        convert_csv_to_binary(csv_path, binary_path)
+    return load_store(binary_path)
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        print(f"{path} -> {convert_csv_to_binary(path, binary_path_for(path))}")